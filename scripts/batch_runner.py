@@ -0,0 +1,96 @@
+import os
+import time
+import shutil
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def find_excel_files(folder, skip_dirs=("processed", "final")):
+    """All .xls/.xlsx files under folder, skipping processed/output sub-folders."""
+    found = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if not any(skip in d for skip in skip_dirs)]
+        found.extend(os.path.join(root, f) for f in files if f.endswith(('.xls', '.xlsx')))
+    return found
+
+
+@contextmanager
+def atomic_output(output_path):
+    """
+    Yields a temp path next to output_path and renames it into place only if
+    the block finishes, so a crash never leaves a half-written file behind.
+    """
+    base, ext = os.path.splitext(output_path)
+    tmp_path = f"{base}.{os.getpid()}.tmp{ext}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def timed_call(func, file_path):
+    """Runs func(file_path) -> (output_path, rows) and adds the elapsed seconds."""
+    start = time.perf_counter()
+    result = func(file_path)
+    return result, time.perf_counter() - start
+
+
+def run_batch(func, files, processed_folder, workers=None):
+    """
+    Cleans files in parallel on a process pool (workers=1 runs in-process).
+    func(file_path) must return (output_path, rows), or None on failure.
+    Originals are moved to processed_folder only after their output was written.
+    """
+    os.makedirs(processed_folder, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    summary = []
+    start = time.perf_counter()
+
+    def finish(file_path, result, secs, error=None):
+        """Moves the original and records the file in summary, exactly once."""
+        name = os.path.basename(file_path)
+        if result:
+            output_path, rows = result
+            try:
+                shutil.move(file_path, os.path.join(processed_folder, name))
+            except OSError as e:
+                # Output is saved but the original stays put: count it as failed so it is retried
+                result, error = None, f"saved {os.path.basename(output_path)} but could not move the original: {e}"
+        if result:
+            rate = rows / secs if secs > 0 else 0
+            print(f"   ✅ {name}: {rows} rows in {secs:.2f}s ({rate:,.0f} rows/sec) -> {os.path.basename(output_path)}")
+        else:
+            print(f"   ❌ {name}: failed{f' ({error})' if error else ''}, left in place")
+        summary.append((name, bool(result), result[1] if result else 0, secs))
+
+    if workers == 1:
+        for file_path in files:
+            try:
+                result, secs = timed_call(func, file_path)
+            except Exception as e:
+                result, secs, error = None, 0, e
+            else:
+                error = None
+            finish(file_path, result, secs, error)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(timed_call, func, f): f for f in files}
+            for future in as_completed(futures):
+                try:
+                    result, secs = future.result()
+                except Exception as e:
+                    result, secs, error = None, 0, e
+                else:
+                    error = None
+                finish(futures[future], result, secs, error)
+
+    wall = time.perf_counter() - start
+    ok = [s for s in summary if s[1]]
+    total_rows = sum(s[2] for s in ok)
+    print("-" * 40)
+    print(f"{len(ok)}/{len(files)} files, {total_rows} rows in {wall:.2f}s wall "
+          f"({total_rows / wall if wall > 0 else 0:,.0f} rows/sec, {workers} workers, "
+          f"{sum(s[3] for s in summary):.2f}s of cleaning)")
+    return summary
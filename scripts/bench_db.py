@@ -0,0 +1,349 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager, redirect_stdout
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from db_schema import apply_tables, apply_indexes
+from data_loader import load_dataframe, COLUMN_MAP
+from trip_lookup import dump_lookup_query, prefetch_query, records_query, records_page_query
+from trip_cache import LEDGER_VERSION_SQL
+from travel_rollups import dashboard_queries
+from travel_records import save_trip_group
+from voucher_allocator import PREVIEW_SQL
+
+# Benchmark of the database paths: trip lookups, voucher preview, Records pages,
+# dashboard reads, trip saves (one clerk and N clerks at once) and data_loader bulk loads.
+# Runs against BENCH_DSN (or --dsn), or starts a throwaway local Postgres
+# (initdb/pg_ctl on PATH). Everything lives in its own schema, bench_<pid>,
+# which is dropped afterwards, so a shared server is left as it was.
+# Usage: python scripts/bench_db.py --local --dump-rows 300000 --clerks 8
+#        BENCH_DSN="host=... dbname=... user=..." python scripts/bench_db.py --out bench_db.json
+
+DSN_ENV = "BENCH_DSN"
+PAX_PER_TRIP = 3
+
+# Stand-ins for the tables the app reads (only the columns it uses are typed strictly)
+DUMP_DDL = """CREATE TABLE {table} (
+    raw_date DATE, trip_id BIGINT, flight_no TEXT, employee_id BIGINT, employee_name TEXT,
+    gender TEXT, address TEXT, landmark TEXT, vehicle_no TEXT, direction TEXT, shift_time TEXT,
+    trip_date DATE, emp_count INTEGER, pax_no INTEGER, marshall TEXT, reporting_location TEXT, trip_zone TEXT
+)"""
+
+TRAVELS_DDL = """CREATE TABLE taxi_travels (
+    s_no SERIAL PRIMARY KEY, travel_date DATE, travel_type TEXT, direction TEXT, shift_time TEXT,
+    trip_id BIGINT, sap_id BIGINT, emp_name TEXT, address TEXT, reason TEXT, amount NUMERIC(10, 2), voucher_no TEXT
+)"""
+
+# PAX_PER_TRIP rows per trip, trips spread over the last `days` days
+DUMP_SEED = """
+    INSERT INTO {table} (raw_date, trip_id, employee_id, employee_name, gender, address, direction,
+                         shift_time, trip_date, emp_count, pax_no)
+    SELECT d, 1000000 + g / %(pax)s, 10000 + g %% 50000, 'EMPLOYEE ' || g,
+           CASE WHEN g %% 2 = 0 THEN 'MALE' ELSE 'FEMALE' END, 'HOUSE ' || g || ', GURGAON',
+           CASE WHEN (g / %(pax)s) %% 2 = 0 THEN 'PICKUP' ELSE 'DROP' END,
+           LPAD(((g / %(pax)s) %% 24)::TEXT, 2, '0') || ':30:00', d, %(pax)s, g %% %(pax)s + 1
+    FROM generate_series(0, %(rows)s - 1) AS g,
+         LATERAL (SELECT %(today)s::DATE - ((g / %(pax)s) %% %(days)s)::INT AS d) AS day
+"""
+
+# Two-employee groups: base voucher with the amount, then its 'A' split
+TRAVELS_SEED = """
+    INSERT INTO taxi_travels (travel_date, travel_type, direction, shift_time, trip_id, sap_id,
+                              emp_name, address, reason, amount, voucher_no)
+    SELECT d, CASE WHEN grp %% 4 = 0 THEN 'Manual' ELSE 'Application' END,
+           CASE WHEN grp %% 2 = 0 THEN 'Pick Up' ELSE 'Drop' END, LPAD((grp %% 24)::TEXT, 2, '0') || ':30',
+           1000000 + grp, 10000 + g %% 50000, 'EMPLOYEE ' || g, 'HOUSE ' || g || ', GURGAON', 'LATE SHIFT',
+           CASE WHEN g %% 2 = 0 THEN 450 ELSE 0 END,
+           TO_CHAR(d, 'YYYYMMDD') || '-' || LPAD((grp / %(days)s + 1)::TEXT, 2, '0') || CASE WHEN g %% 2 = 1 THEN 'A' ELSE '' END
+    FROM generate_series(0, %(rows)s - 1) AS g,
+         LATERAL (SELECT g / 2 AS grp) AS t,
+         LATERAL (SELECT %(today)s::DATE - 1 - (grp %% %(days)s)::INT AS d) AS day
+"""
+
+
+# --- SERVER ---
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def local_postgres():
+    """Throwaway cluster in a temp dir (trust auth, unix socket only). Yields its DSN."""
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not initdb or not pg_ctl:
+        sys.exit(f"❌ initdb/pg_ctl not on PATH: install PostgreSQL or set {DSN_ENV}")
+    with tempfile.TemporaryDirectory() as tmp:
+        data, port = os.path.join(tmp, "data"), free_port()
+        subprocess.run([initdb, "-D", data, "-A", "trust", "-U", "bench"], check=True, capture_output=True)
+        subprocess.run([pg_ctl, "-D", data, "-l", os.path.join(tmp, "pg.log"), "-w", "start",
+                        "-o", f"-p {port} -k {tmp} -c listen_addresses=''"], check=True, capture_output=True)
+        try:
+            yield f"host={tmp} port={port} user=bench dbname=postgres"
+        finally:
+            subprocess.run([pg_ctl, "-D", data, "-m", "immediate", "stop"], capture_output=True)
+
+
+def connect(dsn, schema, autocommit=False):
+    conn = psycopg2.connect(dsn, options=f"-c search_path={schema}")
+    conn.autocommit = autocommit
+    return conn
+
+
+# --- SEED ---
+def seed(dsn, schema, dump_rows, travel_rows, days):
+    today = date.today()
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    conn.close()
+
+    conn = connect(dsn, schema)
+    params = {"rows": dump_rows, "pax": PAX_PER_TRIP, "days": days, "today": today}
+    with conn.cursor() as cur:
+        for table in ("application_data_dump", "manual_data_dump"):
+            cur.execute(DUMP_DDL.format(table=table))
+            cur.execute(DUMP_SEED.format(table=table), params)
+        cur.execute(TRAVELS_DDL)
+        cur.execute(TRAVELS_SEED, {**params, "rows": travel_rows})
+    conn.commit()
+
+    # The app's own tables / indexes (ledger, voucher counters, rollups, lookup indexes)
+    with redirect_stdout(io.StringIO()):
+        apply_tables(conn)
+        apply_indexes(conn)
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO ingestion_ledger (file_hash, file_name, target_table) VALUES (REPEAT('0', 64), 'seed', 'seed')")
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE")
+    conn.close()
+
+
+def drop_schema(dsn, schema):
+    conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    conn.close()
+
+
+# --- MEASURE ---
+def summarize(name, latencies, wall, extra=None):
+    ms = np.array(latencies) * 1000
+    result = {
+        "name": name, "calls": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3), "mean_ms": round(float(ms.mean()), 3),
+        "per_sec": round(len(ms) / wall, 1) if wall > 0 else None, **(extra or {}),
+    }
+    print(f"   {name:28} n={result['calls']:>5}  p50={result['p50_ms']:8.2f}ms  p95={result['p95_ms']:8.2f}ms  "
+          f"p99={result['p99_ms']:8.2f}ms  {result['per_sec'] or 0:>9,.1f}/s")
+    return result
+
+
+def bench_query(conn, name, make_query, iterations):
+    """make_query() -> (sql, params); each call is one execute + fetchall, like run_query()."""
+    latencies = []
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for _ in range(iterations):
+            sql, params = make_query()
+            t = time.perf_counter()
+            cur.execute(sql, params)
+            cur.fetchall()
+            latencies.append(time.perf_counter() - t)
+    return summarize(name, latencies, time.perf_counter() - start)
+
+
+def employees_for(rng, count):
+    return [(10000 + rng.randrange(50000), f"EMPLOYEE {rng.randrange(10**6)}", "HOUSE, GURGAON") for _ in range(count)]
+
+
+def save_trips(conn, saves, rng):
+    """saves trip groups, one transaction each (what the Save button does). Returns latencies."""
+    latencies = []
+    for _ in range(saves):
+        trip = {"travel_date": date.today(), "travel_type": "Application", "direction": "Drop",
+                "shift_time": f"{rng.randrange(24):02d}:30", "trip_id": 1000000 + rng.randrange(10**6),
+                "reason": "LATE SHIFT", "amount": 450.0}
+        t = time.perf_counter()
+        with conn.cursor() as cur:
+            save_trip_group(cur, trip, employees_for(rng, rng.randint(1, PAX_PER_TRIP)))
+        conn.commit()
+        latencies.append(time.perf_counter() - t)
+    return latencies
+
+
+def bench_clerks(dsn, schema, clerks, saves):
+    """clerks threads saving at once; all fight over today's voucher counter row."""
+    conns = [connect(dsn, schema) for _ in range(clerks)]
+    results, errors = [[] for _ in range(clerks)], []
+
+    def clerk(i):
+        try:
+            results[i] = save_trips(conns[i], saves, random.Random(i))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=clerk, args=(i,)) for i in range(clerks)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    with conns[0].cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM (SELECT voucher_no FROM taxi_travels GROUP BY voucher_no HAVING COUNT(*) > 1) AS d")
+        duplicates = cur.fetchone()[0]
+    for conn in conns:
+        conn.close()
+    return summarize(f"save trip x{clerks} clerks", [x for r in results for x in r], wall,
+                     {"clerks": clerks, "errors": len(errors), "duplicate_vouchers": duplicates})
+
+
+def loader_frame(rows, seed=0):
+    """A cleaned-file frame (the columns data_loader reads) with `rows` rows."""
+    rng = np.random.default_rng(seed)
+    day = date.today()
+    return pd.DataFrame({
+        "DATE": day, "TRIP_ID": 5000000 + np.arange(rows) // PAX_PER_TRIP, "FLIGHT_NO.": "AI101",
+        "EMPLOYEE_ID": rng.integers(10000, 60000, rows), "EMPLOYEE_NAME": [f"EMPLOYEE {i}" for i in range(rows)],
+        "GENDER": "MALE", "ADDRESS": "HOUSE 1, GURGAON", "LANDMARK": "NEAR MALL", "VEHICLE_NO": "HR55AB1234",
+        "DIRECTION": "PICKUP", "SHIFT_TIME": "08:30:00", "TRIP_DATE": day, "EMP_COUNT": PAX_PER_TRIP,
+        "PAX_NO": np.arange(rows) % PAX_PER_TRIP + 1, "MARSHALL": None, "REPORTING_LOCATION": "T3", "TRIP_ZONE": "ZONE 1",
+    }, columns=list(COLUMN_MAP.values()))
+
+
+def bench_load(conn, rows, mode, repeat=3):
+    """data_loader.load_dataframe() into application_data_dump, rolled back after each run."""
+    frame = loader_frame(rows)
+    latencies = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            load_dataframe(conn, frame, "application_data_dump", mode)
+        latencies.append(time.perf_counter() - t)
+        conn.rollback()
+    best = min(latencies)
+    return summarize(f"bulk load ({mode})", latencies, sum(latencies), {"rows": rows, "rows_per_sec": round(rows / best)})
+
+
+def run(dsn, args):
+    schema = f"bench_{os.getpid()}"
+    rng = random.Random(0)
+    n_trips, today = args.dump_rows // PAX_PER_TRIP, date.today()
+    results = []
+    try:
+        print(f"🌱 Seeding {schema}: {args.dump_rows} rows per dump table, {args.travel_rows} taxi_travels rows...")
+        start = time.perf_counter()
+        seed(dsn, schema, args.dump_rows, args.travel_rows, args.days)
+        print(f"   done in {time.perf_counter() - start:.1f}s")
+
+        conn = connect(dsn, schema, autocommit=True)
+        with conn.cursor() as cur:
+            cur.execute("SELECT MAX(s_no) FROM taxi_travels")
+            max_s_no = cur.fetchone()[0] or 1
+            cur.execute("SHOW server_version")
+            server = cur.fetchone()[0]
+
+        # 1. Reads (one connection, like a pooled run_query call)
+        def random_trip():
+            return 1000000 + rng.randrange(n_trips)
+
+        def random_day():
+            return today - timedelta(days=rng.randrange(args.days))
+
+        def trip_day():
+            # Seeded trips land on today - (trip % days)
+            trip = rng.randrange(n_trips)
+            return 1000000 + trip, today - timedelta(days=trip % args.days)
+
+        print("📖 Reads")
+        month = (today - timedelta(days=30), today)
+        reads = [
+            ("trip lookup (application)", lambda: dump_lookup_query("Application", random_trip())),
+            ("trip lookup (manual)", lambda: dump_lookup_query("Manual", *trip_day())),
+            ("prefetch day (application)", lambda: prefetch_query("Application", random_day())),
+            ("voucher preview", lambda: (PREVIEW_SQL, (random_day(),))),
+            ("ledger version", lambda: (LEDGER_VERSION_SQL, None)),
+            ("records by trip", lambda: records_query(random_trip())),
+            ("records page (newest)", lambda: records_page_query()),
+            ("records page (deep keyset)", lambda: records_page_query(rng.randrange(1, max_s_no + 1))),
+            ("records page (voucher)", lambda: records_page_query(voucher=random_day().strftime("%Y%m%d"))),
+            ("dashboard spend (30 days)", lambda: dashboard_queries(*month)["spend"]),
+            ("dashboard shifts (30 days)", lambda: dashboard_queries(*month)["shifts"]),
+            ("dashboard employees (month)", lambda: dashboard_queries(*month)["employees"]),
+        ]
+        for name, make_query in reads:
+            results.append(bench_query(conn, name, make_query, args.iterations))
+        conn.close()
+
+        # 2. Writes
+        print("✍️ Writes")
+        conn = connect(dsn, schema)
+        start = time.perf_counter()
+        latencies = save_trips(conn, args.saves, rng)
+        results.append(summarize("save trip (1 clerk)", latencies, time.perf_counter() - start))
+        results.append(bench_clerks(dsn, schema, args.clerks, args.saves))
+        for mode in ("copy", "values"):
+            results.append(bench_load(conn, args.load_rows, mode))
+        conn.close()
+    finally:
+        if args.keep:
+            print(f"ℹ️ Kept schema {schema}")
+        else:
+            drop_schema(dsn, schema)
+
+    return {
+        "environment": {"when": datetime.now().isoformat(timespec="seconds"), "server_version": server},
+        "scale": {"dump_rows": args.dump_rows, "travel_rows": args.travel_rows, "days": args.days},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the app's database queries and inserts")
+    parser.add_argument("--dsn", default=os.environ.get(DSN_ENV), help=f"libpq DSN (default: ${DSN_ENV})")
+    parser.add_argument("--local", action="store_true", help="Start a throwaway local Postgres instead")
+    parser.add_argument("--dump-rows", type=int, default=300000, help="Rows per dump table")
+    parser.add_argument("--travel-rows", type=int, default=100000, help="taxi_travels rows")
+    parser.add_argument("--days", type=int, default=90, help="Days the seeded rows are spread over")
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per read query")
+    parser.add_argument("--saves", type=int, default=50, help="Trip saves per clerk")
+    parser.add_argument("--clerks", type=int, default=8, help="Clerks saving at the same time")
+    parser.add_argument("--load-rows", type=int, default=50000, help="Rows per bulk-load run")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema for inspection")
+    parser.add_argument("--out", default="bench_db.json", help="JSON file for the results")
+    args = parser.parse_args()
+
+    if not args.dsn and not args.local:
+        sys.exit(f"❌ Set {DSN_ENV} / --dsn, or use --local")
+
+    if args.local:
+        with local_postgres() as dsn:
+            report = run(dsn, args)
+    else:
+        report = run(args.dsn, args)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {args.out}")
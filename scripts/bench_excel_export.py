@@ -0,0 +1,149 @@
+import io
+import time
+import argparse
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+import openpyxl
+
+from excel_export import export_excel, order_by_trip, trip_plan, BILLING_STYLE, OPS_STYLE
+
+# Benchmark: the old iterrows/cell-by-cell writers vs excel_export.
+# Usage: python scripts/bench_excel_export.py --rows 1000 10000
+
+
+# --- OLD WRITERS (as they were in row_data_cleaner_app.py) ---
+def legacy_to_excel_billing(df):
+    output = io.BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    workbook = writer.book
+    worksheet = workbook.add_worksheet('Sheet1')
+    base_format_props = {'font_size': 13, 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True}
+    base_format = workbook.add_format(base_format_props)
+    time_format = workbook.add_format({**base_format_props, 'num_format': 'hh:mm'})
+    header_format = workbook.add_format({
+        'font_size': 13, 'border': 1, 'align': 'center', 'valign': 'vcenter',
+        'bold': True, 'text_wrap': True, 'fg_color': '#0070C0', 'font_color': '#FFFFFF'
+    })
+    worksheet.set_row(0, 30)
+    for col_num, col_name in enumerate(df.columns):
+        worksheet.write(0, col_num, col_name, header_format)
+    for row_idx, row_data in df.iterrows():
+        excel_row = row_idx + 1
+        worksheet.set_row(excel_row, 30)
+        for col_num, value in enumerate(row_data):
+            col_name = df.columns[col_num]
+            cell_format = time_format if col_name in ['SHIFT_TIME', 'HOME_TIME', 'PICKUP POINT'] else base_format
+            worksheet.write(excel_row, col_num, value if pd.notna(value) else "", cell_format)
+    writer.close()
+    output.seek(0)
+    return output
+
+
+def legacy_to_excel_operations(df):
+    output = io.BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    workbook = writer.book
+    worksheet = workbook.add_worksheet('Sheet1')
+    base_format_props = {'font_size': 13, 'border': 1, 'align': 'center', 'valign': 'vcenter', 'text_wrap': True}
+    base_format = workbook.add_format(base_format_props)
+    time_format = workbook.add_format({**base_format_props, 'num_format': 'hh:mm'})
+    header_format = workbook.add_format({
+        'font_size': 13, 'border': 1, 'align': 'center', 'valign': 'vcenter',
+        'bold': True, 'text_wrap': True, 'fg_color': '#0070C0', 'font_color': '#FFFFFF'
+    })
+    worksheet.set_row(0, 50)
+    for col_num, col_name in enumerate(df.columns):
+        worksheet.write(0, col_num, col_name, header_format)
+    trip_id_col_idx = df.columns.get_loc("TRIP_ID") if "TRIP_ID" in df.columns else 0
+    for row_idx, row_data in df.iterrows():
+        excel_row = row_idx + 1
+        cell_value = row_data.iloc[trip_id_col_idx]
+        if pd.isna(cell_value):
+            worksheet.set_row(excel_row, 40)
+        elif str(cell_value) == "TRIP_ID":
+            worksheet.set_row(excel_row, 50)
+            for col_num, value in enumerate(row_data):
+                worksheet.write(excel_row, col_num, value, header_format)
+        else:
+            worksheet.set_row(excel_row, 45)
+            for col_num, value in enumerate(row_data):
+                col_name = df.columns[col_num]
+                cell_format = time_format if col_name in ['SHIFT_TIME', 'HOME_TIME', 'PICKUP POINT'] else base_format
+                worksheet.write(excel_row, col_num, value if pd.notna(value) else "", cell_format)
+    writer.close()
+    output.seek(0)
+    return output
+
+
+# --- SAMPLE DATA ---
+def make_billing_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    trip_ids = (1000000 + np.arange(n_rows) // 3).astype(str)
+    return pd.DataFrame({
+        'TRIP_DATE': '25-11-2025',
+        'TRIP_ID': trip_ids,
+        'FLIGHT_NO.': pd.Series('AI101', index=range(n_rows)).where(rng.random(n_rows) >= 0.3),
+        'EMPLOYEE_ID': rng.integers(10000, 99999, n_rows),
+        'EMPLOYEE_NAME': [f'EMPLOYEE {i}' for i in range(n_rows)],
+        'GENDER': rng.choice(['MALE', 'FEMALE'], n_rows),
+        'ADDRESS': [f'HOUSE {i}, SECTOR {i % 80}, GURGAON, HARYANA' for i in range(n_rows)],
+        'VEHICLE_NO': 'HR55AB1234',
+        'DIRECTION': 'PICKUP',
+        'SHIFT_TIME': [dtime(h % 24, 30) for h in rng.integers(0, 24, n_rows)],
+        'EMP_COUNT': 3,
+        'PAX_NO': np.arange(n_rows) % 3 + 1,
+        'MARSHALL': pd.Series('GUARD', index=range(n_rows)).where(rng.random(n_rows) >= 0.5),
+    })
+
+
+def make_ops_frame(n_rows, seed=0):
+    """The old Ops frame: trips concatenated with a blank row and a header row between them."""
+    df = make_billing_frame(n_rows, seed)
+    empty_row = pd.DataFrame([[np.nan] * len(df.columns)], columns=df.columns)
+    header_row = pd.DataFrame([df.columns.values], columns=df.columns)
+    parts = []
+    groups = list(df.groupby('TRIP_ID', sort=False))
+    for i, (_, group) in enumerate(groups):
+        parts.append(group)
+        if i < len(groups) - 1:
+            parts.extend([empty_row, header_row])
+    return pd.concat(parts, ignore_index=True)
+
+
+# --- HELPERS ---
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def sheet_values(buffer):
+    ws = openpyxl.load_workbook(buffer).active
+    return [[c.value for c in row] for row in ws.iter_rows()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.rows:
+        billing, ops = make_billing_frame(n), make_ops_frame(n)
+        # New Ops path: rows grouped by trip, separators drawn from the row plan
+        trips = order_by_trip(billing)
+        cases = [
+            ("billing", lambda: legacy_to_excel_billing(billing), lambda: export_excel(billing, BILLING_STYLE)),
+            ("ops", lambda: legacy_to_excel_operations(ops), lambda: export_excel(trips, OPS_STYLE, trip_plan(trips))),
+        ]
+        for name, old, new in cases:
+            old_secs, old_buf = timed(old, repeat=args.repeat)
+            new_secs, new_buf = timed(new, repeat=args.repeat)
+            same = sheet_values(old_buf) == sheet_values(new_buf)
+            print(f"{name:8} rows={n:>7}  old={old_secs:7.3f}s  new={new_secs:7.3f}s  "
+                  f"speedup={old_secs / new_secs:5.2f}x  identical={same}")
@@ -0,0 +1,200 @@
+import io
+import os
+import re
+import sys
+import time
+import tempfile
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from manual_data_clener import clean_excel_file, parse_manual_sheet
+from synthetic_sheets import manual_sheet
+
+# Golden-output check + timing: the old "CSV Trick" cleaner vs manual_data_clener.py.
+# Two differences are intended (text_normalize.py kernels) and allowed, nothing else:
+# - missing text cells: the old cleaner wrote 'NAN' / 'NONE' / 'NAT' / '<NA>', now they stay missing
+#   (and text columns are string[pyarrow] instead of object);
+# - REPORTING_TIME: the old parse guessed one format from the first cell, so with mixed
+#   'HH:MM' / 'HH:MM:SS' shifts the rest came out NaT; now both parse (ISO8601).
+# Exits 1 if any output differs otherwise.
+# Usage: python scripts/bench_manual_cleaner.py --rows 1000 10000
+#        python scripts/bench_manual_cleaner.py --files "D:\...\01-12-2025 manual.xlsx"
+
+pd.set_option('future.no_silent_downcasting', True)
+
+
+# --- OLD CLEANER (as it was in manual_data_clener.py) ---
+def legacy_clean_excel_file(file_path, filename):
+    """
+    Reads a raw Excel file, applies cleaning logic, and returns a clean DataFrame.
+    """
+    try:
+        # --- STEP 1: LOAD DIRTY DATA ---
+        raw_df = pd.read_excel(file_path, header=None)
+        
+        if raw_df.empty:
+            print(f"Skipping empty file: {filename}")
+            return None
+
+        # The "CSV Trick"
+        csv_buffer = io.StringIO()
+        raw_df.to_csv(csv_buffer, index=False, header=False)
+        csv_buffer.seek(0)
+        df = pd.read_csv(csv_buffer, header=None)
+
+        # Basic Cleanup
+        df = df.replace(r'^\s*$', np.nan, regex=True)
+        df = df.dropna(how='all').reset_index(drop=True)
+
+        # --- STEP 2: EXTRACT METADATA ---
+        # A. Reporting Location
+        target_str = "EMPLOYEE ADDRESS"
+        if 4 in df.columns:
+            df["REPORTING_LOCATION"] = df[4].astype(str).apply(lambda x: x if target_str in x else np.nan)
+            df["REPORTING_LOCATION"] = df["REPORTING_LOCATION"].str.extract(r'"([^"]*)"')
+            df["REPORTING_LOCATION"] = df["REPORTING_LOCATION"].ffill()
+        else:
+            df["REPORTING_LOCATION"] = np.nan
+
+        # B. Date from Filename
+        date_match = re.search(r'(\d{2}-\d{2}-\d{4})', filename)
+        file_date_str = date_match.group(1) if date_match else np.nan
+        
+        # --- STEP 3: RENAME & FILTER COLUMNS ---
+        header_mapping = {
+            0: 'TRIP_ID', 1: 'TRG_TYPE', 2: 'EMPLOYEE_ID', 3: 'EMPLOYEE_NAME',
+            4: 'ADDRESS', 5: 'DRIVER_MOBILE', 6: 'CAB_4_DIGIT', 7: 'PICKUP_TIME',
+            8: 'SHIFT_TIME', 9: 'MIS_REMARKS', 10: 'GENDER', 11: 'TRIP_SHEET_ID_RAW'
+        }
+        df = df.rename(columns=header_mapping)
+
+        # Drop "Header" rows (EMP ID)
+        if "EMPLOYEE_ID" in df.columns:
+            df = df[~df["EMPLOYEE_ID"].astype(str).str.contains("EMP ID", na=False, regex=False)]
+
+        # --- STEP 4: ENRICH DATA ---
+        # A. Add Direction
+        df["DIRECTION"] = "PICKUP"
+
+        # B. Trip ID & No
+        df["TRIP_ID"] = df["TRIP_ID"].ffill()
+        df["TRIP_NO"] = "ROUTE NO : " + df["TRIP_ID"].astype(str)
+
+        # C. Dates & Times
+        date_obj = pd.to_datetime(file_date_str, dayfirst=True, errors='coerce')
+        df['DATE'] = date_obj.date() if pd.notnull(date_obj) else np.nan
+
+        df['SHIFT_TIME'] = df['SHIFT_TIME'].astype(str).str.strip()
+        temp_date_str = date_obj.strftime('%Y-%m-%d') if pd.notnull(date_obj) else ""
+        df['temp_combined'] = temp_date_str + ' ' + df['SHIFT_TIME']
+        
+        df['REPORTING_TIME'] = pd.to_datetime(df['temp_combined'], errors='coerce')
+
+        # --- STEP 5: TYPE CONVERSION ---
+        cols_to_numeric = ['EMPLOYEE_ID', 'CAB_4_DIGIT']
+        for col in cols_to_numeric:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        str_cols = df.select_dtypes(include=['object']).columns
+        df[str_cols] = df[str_cols].apply(lambda x: x.astype(str).str.strip().str.upper())
+
+        # --- STEP 6: REORDER ---
+        desired_order = [
+            'DATE', 'TRIP_ID', 'TRIP_NO', 'DIRECTION', 'TRG_TYPE', 'EMPLOYEE_ID',
+            'GENDER', 'EMPLOYEE_NAME', 'ADDRESS', 'CAB_4_DIGIT',
+            'SHIFT_TIME', 'REPORTING_TIME', 'REPORTING_LOCATION', 'MIS_REMARKS'
+        ]
+        df = df.reindex(columns=desired_order)
+        
+        return df
+
+    except Exception as e:
+        print(f"Error processing {filename}: {e}")
+        return None
+
+
+def legacy_parse(raw_df):
+    """Just the CSV Trick + cleanup step of the old cleaner."""
+    csv_buffer = io.StringIO()
+    raw_df.to_csv(csv_buffer, index=False, header=False)
+    csv_buffer.seek(0)
+    df = pd.read_csv(csv_buffer, header=None)
+    df = df.replace(r'^\s*$', np.nan, regex=True)
+    return df.dropna(how='all').reset_index(drop=True)
+
+
+# --- HELPERS ---
+OLD_MISSING = ['NAN', 'NONE', 'NAT', '<NA>']
+
+
+def as_text(values, missing=()):
+    """Cells as str, missing ones (and the old missing markers) as None."""
+    values = values.astype(object)
+    present = values.notna() & ~values.isin(list(missing))
+    return values.where(present, None).map(lambda v: None if v is None else str(v))
+
+
+def differences(old_df, new_df):
+    """Columns where new_df differs from the old cleaner's output beyond the intended changes."""
+    if list(old_df.columns) != list(new_df.columns) or not old_df.index.equals(new_df.index):
+        return ['<layout>']
+    diff = []
+    for col in old_df.columns:
+        old, new = old_df[col], new_df[col]
+        if col == 'REPORTING_TIME':
+            parsed = old.notna()
+            same = new[parsed].equals(old[parsed])
+        elif old.dtype == object:
+            same = as_text(old, OLD_MISSING).equals(as_text(new))
+        else:
+            same = old.dtype == new.dtype and old.equals(new)
+        if not same:
+            diff.append(col)
+    return diff
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare(path, repeat):
+    name = os.path.basename(path)
+    old_secs, old_df = timed(legacy_clean_excel_file, path, name, repeat=repeat)
+    new_secs, new_df = timed(clean_excel_file, path, name, repeat=repeat)
+    same = old_df is not None and new_df is not None and not differences(old_df, new_df)
+    rows = len(new_df) if new_df is not None else 0
+    print(f"{name[:30]:30} rows={rows:>7}  old={old_secs:7.3f}s  new={new_secs:7.3f}s  "
+          f"speedup={old_secs / new_secs:5.2f}x  identical={same}")
+
+    # The parse step alone (read_excel is the same in both and dominates the totals)
+    raw_df = pd.read_excel(path, header=None)
+    old_secs, _ = timed(legacy_parse, raw_df, repeat=repeat)
+    new_secs, _ = timed(parse_manual_sheet, raw_df, repeat=repeat)
+    print(f"{'  parse step only':30} {'':12}  old={old_secs:7.3f}s  new={new_secs:7.3f}s  "
+          f"speedup={old_secs / new_secs:5.2f}x")
+    return same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--files", nargs="+", default=[], help="Real raw manual sheets to check")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [compare(path, args.repeat) for path in args.files]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            path = os.path.join(tmp, f"01-12-2025 manual {n}.xlsx")
+            manual_sheet(n).to_excel(path, index=False, header=False)
+            results.append(compare(path, args.repeat))
+
+    sys.exit(0 if all(results) else 1)
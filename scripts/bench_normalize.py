@@ -0,0 +1,93 @@
+import sys
+import time
+import argparse
+
+import pandas as pd
+
+from synthetic_sheets import VENDORS, raw_tripsheet, trips_for_rows
+from tripsheet_parser import parse_tripsheet, derive_columns
+from text_normalize import normalize_frame
+
+# Golden-output check + timing: the old per-column lambdas vs the Arrow kernels in
+# text_normalize.py, on parsed synthetic TripSheets. The only allowed difference is
+# missing cells: the old code wrote them as 'NAN' / 'NONE' / 'NAT' / '<NA>', the kernels keep them missing.
+# Exits 1 if anything else differs.
+# Usage: python scripts/bench_normalize.py --rows 10000 100000
+
+OLD_MISSING = ['NAN', 'NONE', 'NAT', '<NA>', 'nan', 'None', 'NaT']
+
+
+# --- OLD CODE (as it was in the cleaners / tripsheet_parser.py) ---
+def legacy_upper_strip(df):
+    str_cols = df.select_dtypes(include=['object']).columns
+    df[str_cols] = df[str_cols].apply(lambda x: x.astype(str).str.strip().str.upper())
+    return df
+
+
+def legacy_derive(final):
+    final['Trip_ID'] = final['Trip_ID'].str.replace('T', '', regex=False)
+    final['Vehicle_No'] = final['Vehicle_No'].astype(str).str.replace('-', '', regex=False)
+    split_data = final['Driver_Login_Time'].astype(str).str.strip().str.split(n=1, expand=True)
+    direction = split_data[0] if 0 in split_data.columns else pd.Series('', index=final.index)
+    shift_raw = split_data[1].str.strip() if 1 in split_data.columns else pd.Series(pd.NA, index=final.index, dtype=object)
+    final['Direction'] = direction.str.upper().replace({'LOGIN': 'PICKUP', 'LOGOUT': 'DROP'}, regex=True)
+    final['Shift_Time_Obj'] = pd.to_datetime(shift_raw, format='%H:%M', errors='coerce')
+    final['Shift_Time'] = final['Shift_Time_Obj'].dt.time
+    return final
+
+
+# --- HELPERS ---
+def timed(func, df, repeat=3):
+    """Best of `repeat` runs, each on a fresh copy (both sides edit the frame in place)."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        frame = df.copy()
+        start = time.perf_counter()
+        result = func(frame)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_text(old, new):
+    """Equal once the old missing markers are read as missing."""
+    old = old.astype(object).where(old.notna() & ~old.isin(OLD_MISSING), '<missing>')
+    new = new.astype(object).where(new.notna(), '<missing>')
+    return old.astype(str).equals(new.astype(str))
+
+
+def compare(name, legacy, kernel, df, repeat, typed_df=None):
+    """typed_df: the kernel's input when it differs (the TRIP_SCHEMA-typed frame the cleaners now get)."""
+    old_secs, old_df = timed(legacy, df, repeat)
+    new_secs, new_df = timed(kernel, df if typed_df is None else typed_df, repeat)
+    same = list(old_df.columns) == list(new_df.columns) and all(same_text(old_df[c], new_df[c]) for c in old_df.columns)
+    print(f"   {name:22} rows={len(df):>7}  old={old_secs:7.3f}s  new={new_secs:7.3f}s  "
+          f"speedup={old_secs / new_secs:5.2f}x  identical={same}")
+    return same
+
+
+def parsed_frames(n_rows):
+    """(merged rows before derive, parsed frame) for a generic sheet of about n_rows passengers."""
+    raw = raw_tripsheet(trips_for_rows(n_rows, (1, 7)), pax=(1, 7), vendors=VENDORS, direction=None, seed=n_rows)
+    parsed = parse_tripsheet(raw, 'GENERIC')
+    merged = parsed.drop(columns=['Direction', 'Shift_Time_Obj', 'Shift_Time']).astype(object)
+    merged['Trip_ID'] = 'T' + merged['Trip_ID'].astype(str)
+    return merged, parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for n in args.rows:
+        print(f"⏱️ {n} rows")
+        merged, parsed = parsed_frames(n)
+        # The cleaners upper-strip after their own date / number handling; the parsed frame is close enough.
+        # Old side: every column that is not a number or datetime as object, like before TRIP_SCHEMA.
+        old_parsed = parsed.astype({c: object for c in parsed.select_dtypes(exclude=['number', 'datetime']).columns})
+        results.append(compare("upper_strip", legacy_upper_strip, normalize_frame, old_parsed, args.repeat, parsed))
+        results.append(compare("derive", legacy_derive, derive_columns, merged, args.repeat))
+
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,181 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from contextlib import redirect_stdout
+
+# Parsed-sheet cache off: every read below must really parse the file
+os.environ.pop("EXCEL_CACHE_DIR", None)
+
+import pandas as pd
+
+from synthetic_sheets import VENDORS, raw_tripsheet, trips_for_rows, manual_sheet, write_sheet
+from tripsheet_parser import load_raw_sheet, parse_tripsheet
+from manual_data_clener import clean_excel_file
+from mearging_excel_files import merge_files
+from excel_export import export_excel, trip_plan, BILLING_STYLE, OPS_STYLE
+from stage_profiler import StageProfiler
+
+# Benchmarks for the whole pipeline on synthetic sheets (synthetic_sheets.py):
+# read + parse, every cleaner end to end, merge and Excel export, at each --rows size.
+# Results go to a JSON file; --baseline compares against an earlier run and
+# exits 1 if anything got slower than --tolerance.
+# Usage: python scripts/bench_suite.py --rows 1000 10000 100000 --out bench.json
+#        python scripts/bench_suite.py --baseline bench.json
+
+MERGE_FILES = 4
+BENCH_DATE = "25-11-2025"
+
+
+# --- HELPERS ---
+def timed(func, repeat=3):
+    """Best of `repeat` runs (cleaner output silenced). Returns (secs, last result)."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def staged(func, repeat=3):
+    """timed() for a func(profiler); also returns the stage seconds of the fastest run."""
+    best, stages = float('inf'), None
+    for _ in range(repeat):
+        profiler = StageProfiler()
+        secs, _ = timed(lambda: func(profiler), repeat=1)
+        if secs < best:
+            best, stages = secs, {row["stage"]: round(row["secs"], 4) for row in profiler.report()}
+    return best, stages
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "when": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+        "python": platform.python_version(), "pandas": pd.__version__,
+        "platform": platform.platform(), "cpus": os.cpu_count(),
+    }
+
+
+# --- BENCHMARKS ---
+def run_size(n_rows, tmp, repeat):
+    """Every benchmark at about n_rows passenger rows. Returns [result dict]."""
+    import row_data_cleaner
+    import row_data_cleaner_app
+    import other
+
+    results = []
+
+    def record(bench, secs, rows, stages=None):
+        result = {"bench": bench, "size": n_rows, "rows": rows, "secs": round(secs, 4),
+                  "rows_per_sec": round(rows / secs) if secs > 0 else None}
+        if stages:
+            result["stages"] = stages
+        results.append(result)
+        print(f"   {bench:22} rows={rows:>7}  {secs:8.3f}s  {result['rows_per_sec'] or 0:>10,} rows/sec")
+
+    # Inputs
+    trips = trips_for_rows(n_rows)
+    uf_path = write_sheet(raw_tripsheet(trips, seed=n_rows), os.path.join(tmp, f"uf_{n_rows}.xlsx"))
+    generic_path = write_sheet(raw_tripsheet(trips, pax=(1, 7), vendors=VENDORS, seed=n_rows),
+                               os.path.join(tmp, f"generic_{n_rows}.xlsx"))
+    manual_path = write_sheet(manual_sheet(n_rows, seed=n_rows), os.path.join(tmp, f"{BENCH_DATE} manual {n_rows}.xlsx"))
+
+    # 1. Read + parse
+    secs, raw_df = timed(lambda: load_raw_sheet(uf_path), repeat)
+    record("read_tripsheet", secs, len(raw_df))
+    secs, parsed = timed(lambda: parse_tripsheet(raw_df, 'UNITED FACILITIES'), repeat)
+    record("parse_tripsheet", secs, len(parsed))
+
+    # 2. Cleaners end to end
+    out_dir = os.path.join(tmp, "clean")
+    os.makedirs(out_dir, exist_ok=True)
+    secs, stages = staged(lambda p: row_data_cleaner.clean_data(uf_path, out_dir, p), repeat)
+    record("clean_data", secs, len(parsed), stages)
+
+    secs, stages = staged(lambda p: row_data_cleaner_app.process_data(uf_path, p), repeat)
+    billing_df, ops_df, _ = row_data_cleaner_app.process_data(uf_path)
+    record("process_data_app", secs, len(billing_df), stages)
+
+    secs, stages = staged(lambda p: other.process_data(generic_path, p), repeat)
+    record("process_data_generic", secs, len(other.process_data(generic_path)[0]), stages)
+
+    secs, manual_df = timed(lambda: clean_excel_file(manual_path, os.path.basename(manual_path)), repeat)
+    record("clean_manual", secs, len(manual_df))
+
+    # 3. Merge (the billing frame split over a few files, like a month of cleaned sheets)
+    merge_dir = os.path.join(tmp, f"merge_{n_rows}")
+    os.makedirs(merge_dir, exist_ok=True)
+    chunk = -(-len(billing_df) // MERGE_FILES)
+    parts = [write_sheet(billing_df.iloc[i:i + chunk], os.path.join(merge_dir, f"part{i // chunk}.xlsx"))
+             for i in range(0, len(billing_df), chunk)]
+    for fmt in ("xlsx", "parquet"):
+        output_path = os.path.join(tmp, f"merged_{n_rows}.{fmt}")
+        secs, _ = timed(lambda: merge_files(parts, output_path, fmt), repeat)
+        record(f"merge_{fmt}", secs, len(billing_df))
+
+    # 4. Excel export
+    secs, _ = timed(lambda: export_excel(billing_df, BILLING_STYLE), repeat)
+    record("export_billing", secs, len(billing_df))
+    secs, _ = timed(lambda: export_excel(ops_df, OPS_STYLE, trip_plan(ops_df)), repeat)
+    record("export_ops", secs, len(ops_df))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints new/old time per benchmark; returns the (bench, size) pairs slower than tolerance."""
+    old = {(r["bench"], r["size"]): r["secs"] for r in baseline["results"]}
+    regressions = []
+    print(f"📊 Against {baseline['environment'].get('commit') or 'baseline'} ({baseline['environment']['when']}):")
+    for r in results:
+        key = (r["bench"], r["size"])
+        if key not in old:
+            continue
+        ratio = r["secs"] / old[key] if old[key] else float('inf')
+        flag = "❌" if ratio > tolerance else "✅"
+        print(f"   {flag} {r['bench']:22} size={r['size']:>7}  {old[key]:8.3f}s -> {r['secs']:8.3f}s  ({ratio:5.2f}x)")
+        if ratio > tolerance:
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TripSheet pipeline on synthetic sheets")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Passenger rows per size (e.g. 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (the best is kept)")
+    parser.add_argument("--out", default="bench_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    # Read first: --out may be the same file
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            print(f"⏱️ {n} rows")
+            results.extend(run_size(n, tmp, args.repeat))
+
+    report = {"environment": environment(), "repeat": args.repeat, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {args.out}")
+
+    if baseline:
+        sys.exit(1 if compare(results, baseline, args.tolerance) else 0)
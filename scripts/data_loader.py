@@ -1,8 +1,13 @@
 import os
+import io
+import time
 import shutil
-import pandas as pd
+import argparse
 import psycopg2
+from psycopg2.extras import execute_values
 import toml  # <--- Library to read your secrets.toml file
+from excel_reader import read_excel, file_hash
+from staging import STAGING_EXT, read_staging
 
 # --- CONFIGURATION ---
 APP_FOLDER = r"C:\Users\Ravi Pal\my_projects\project_p767\Taxi_management_db\data\application_files"
@@ -33,14 +38,142 @@ def get_db_connection():
         print(f"❌ DB Connection Failed: {e}")
         return None
 
-def process_folder(folder_path, table_name):
+# --- BULK LOAD SETTINGS ---
+BATCH_SIZE = 5000       # Rows per COPY / execute_values batch
+LOAD_MODE = "copy"      # "copy" (COPY FROM STDIN) or "values" (execute_values batches)
+
+# --- INGESTION LEDGER ---
+# One row per loaded file content, so a re-dropped or renamed file is never inserted twice
+LEDGER_DDL = """
+    CREATE TABLE IF NOT EXISTS ingestion_ledger (
+        file_hash CHAR(64) PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        target_table TEXT NOT NULL,
+        row_count INTEGER,
+        loaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+# Target column -> column name in the cleaned Excel file
+COLUMN_MAP = {
+    "raw_date": "DATE", "trip_id": "TRIP_ID", "flight_no": "FLIGHT_NO.",
+    "employee_id": "EMPLOYEE_ID", "employee_name": "EMPLOYEE_NAME", "gender": "GENDER",
+    "address": "ADDRESS", "landmark": "LANDMARK", "vehicle_no": "VEHICLE_NO",
+    "direction": "DIRECTION", "shift_time": "SHIFT_TIME", "trip_date": "TRIP_DATE",
+    "emp_count": "EMP_COUNT", "pax_no": "PAX_NO", "marshall": "MARSHALL",
+    "reporting_location": "REPORTING_LOCATION", "trip_zone": "TRIP_ZONE",
+}
+
+
+def is_loaded_column(name):
+    """usecols filter: only the COLUMN_MAP columns are parsed out of the workbook."""
+    return str(name).strip() in COLUMN_MAP.values()
+
+
+def prepare_frame(df):
+    """Builds the insert frame (DB column names, in COLUMN_MAP order) in one vectorized pass."""
+    df = df.copy()
+    df.columns = df.columns.astype(str).str.strip()
+    out = df.reindex(columns=list(COLUMN_MAP.values()))
+    out.columns = list(COLUMN_MAP.keys())
+
+    # SHIFT_TIME was always sent as text (time objects / "HH:MM:SS" strings)
+    out["shift_time"] = out["shift_time"].where(out["shift_time"].isna(), out["shift_time"].astype(str))
+
+    # Excel gives float columns whenever a number column has blanks (2 -> 2.0),
+    # which Postgres rejects for integer columns in COPY. Use nullable ints instead.
+    for col in out.select_dtypes(include=["float"]).columns:
+        values = out[col].dropna()
+        if (values == values.round()).all():
+            out[col] = out[col].astype("Int64")
+    return out
+
+
+def copy_batches(cur, df, table_name, batch_size=BATCH_SIZE):
+    """Streams the frame into Postgres with COPY FROM STDIN, batch_size rows at a time."""
+    sql = f"COPY {table_name} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)"
+    for start in range(0, len(df), batch_size):
+        buffer = io.StringIO()
+        # Empty unquoted fields are NULL in CSV COPY
+        df.iloc[start:start + batch_size].to_csv(buffer, index=False, header=False, na_rep="")
+        buffer.seek(0)
+        cur.copy_expert(sql, buffer)
+
+
+def values_batches(cur, df, table_name, batch_size=BATCH_SIZE):
+    """Fallback: multi-row INSERTs through psycopg2's execute_values."""
+    sql = f"INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES %s"
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    execute_values(cur, sql, rows, page_size=batch_size)
+
+
+def load_dataframe(conn, df, table_name, mode=LOAD_MODE, batch_size=BATCH_SIZE):
+    """Loads a cleaned frame into table_name and returns the number of rows sent."""
+    frame = prepare_frame(df)
+    if frame.empty:
+        return 0
+
+    cur = conn.cursor()
+    try:
+        if mode == "copy":
+            # Savepoint: a failed COPY must not roll back the rest of the file's transaction
+            cur.execute("SAVEPOINT bulk_copy")
+            try:
+                copy_batches(cur, frame, table_name, batch_size)
+                cur.execute("RELEASE SAVEPOINT bulk_copy")
+            except psycopg2.Error as e:
+                # COPY can be blocked by permissions / proxies: retry the same file as INSERT batches
+                print(f"   ⚠️ COPY failed ({e}), falling back to execute_values...")
+                cur.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                values_batches(cur, frame, table_name, batch_size)
+        else:
+            values_batches(cur, frame, table_name, batch_size)
+    finally:
+        cur.close()
+    return len(frame)
+
+
+def claim_file(cur, content_hash, file_name, table_name):
+    """
+    Records the file in the ledger inside the current transaction.
+    False if this content was already loaded (or is being loaded by another run).
+    """
+    cur.execute(
+        """INSERT INTO ingestion_ledger (file_hash, file_name, target_table)
+           VALUES (%s, %s, %s) ON CONFLICT (file_hash) DO NOTHING RETURNING file_hash""",
+        (content_hash, file_name, table_name),
+    )
+    return cur.fetchone() is not None
+
+
+def read_cleaned_file(file_path):
+    """Typed staging file as-is, or the cleaned Excel report (only the loaded columns)."""
+    if file_path.endswith(STAGING_EXT):
+        return read_staging(file_path)
+    return read_excel(file_path, usecols=is_loaded_column)
+
+
+def move_to_processed(folder_path, processed_path, file_name):
+    """Moves a loaded file into processed/, together with the .xlsx report of a staging file."""
+    names = [file_name]
+    if file_name.endswith(STAGING_EXT):
+        base = file_name[:-len(STAGING_EXT)]
+        names += [base + ext for ext in ('.xlsx', '.xls') if os.path.exists(os.path.join(folder_path, base + ext))]
+    for name in names:
+        shutil.move(os.path.join(folder_path, name), os.path.join(processed_path, name))
+
+
+def process_folder(folder_path, table_name, mode=LOAD_MODE, batch_size=BATCH_SIZE):
     # Ensure 'processed' folder exists
     processed_path = os.path.join(folder_path, "processed")
     if not os.path.exists(processed_path):
         os.makedirs(processed_path)
 
-    # Get list of Excel files
-    files = [f for f in os.listdir(folder_path) if f.endswith(('.xlsx', '.xls'))]
+    # Get list of cleaned files. A report with a .parquet staging twin holds
+    # the same rows, so only the staging file is loaded.
+    files = [f for f in os.listdir(folder_path) if f.endswith(('.xlsx', '.xls', STAGING_EXT))]
+    staged = {f[:-len(STAGING_EXT)] for f in files if f.endswith(STAGING_EXT)}
+    files = [f for f in files if f.endswith(STAGING_EXT) or os.path.splitext(f)[0] not in staged]
     
     if not files:
         print(f"ℹ️ No new files found in {folder_path}")
@@ -48,69 +181,74 @@ def process_folder(folder_path, table_name):
 
     conn = get_db_connection()
     if not conn: return
-    cur = conn.cursor()
 
-    print(f"📂 Processing {len(files)} files for table '{table_name}'...")
+    print(f"📂 Processing {len(files)} files for table '{table_name}' (mode={mode}, batch={batch_size})...")
 
+    with conn.cursor() as cur:
+        cur.execute(LEDGER_DDL)
+    conn.commit()
+
+    total_rows, total_secs = 0, 0.0
     for file_name in files:
         file_path = os.path.join(folder_path, file_name)
         print(f"   Reading: {file_name}...")
         
         try:
-            df = pd.read_excel(file_path)
-            # Clean column names
-            df.columns = df.columns.str.strip()
-
-            rows_inserted = 0
-            for _, row in df.iterrows():
-                sql = f"""
-                    INSERT INTO {table_name} (
-                        raw_date, trip_id, flight_no, employee_id, employee_name, gender, 
-                        address, landmark, vehicle_no, direction, shift_time, trip_date, 
-                        emp_count, pax_no, marshall, reporting_location, trip_zone
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                # Use .get() to handle missing columns safely
-                values = (
-                    row.get('DATE'), row.get('TRIP_ID'), row.get('FLIGHT_NO.'), 
-                    row.get('EMPLOYEE_ID'), row.get('EMPLOYEE_NAME'), row.get('GENDER'),
-                    row.get('ADDRESS'), row.get('LANDMARK'), row.get('VEHICLE_NO'),
-                    row.get('DIRECTION'), str(row.get('SHIFT_TIME')), row.get('TRIP_DATE'),
-                    row.get('EMP_COUNT'), row.get('PAX_NO'), row.get('MARSHALL'),
-                    row.get('REPORTING_LOCATION'), row.get('TRIP_ZONE')
-                )
-                
-                cur.execute(sql, values)
-                rows_inserted += 1
+            start = time.perf_counter()
+            content_hash = file_hash(file_path)
+
+            # Ledger row + data rows commit together: a crash mid-file leaves neither behind
+            with conn.cursor() as cur:
+                if not claim_file(cur, content_hash, file_name, table_name):
+                    conn.rollback()
+                    print("   ⏭️ Already ingested (same content), skipping.")
+                    move_to_processed(folder_path, processed_path, file_name)
+                    continue
 
+                df = read_cleaned_file(file_path)
+                read_secs = time.perf_counter() - start
+
+                rows_inserted = load_dataframe(conn, df, table_name, mode, batch_size)
+                cur.execute("UPDATE ingestion_ledger SET row_count = %s WHERE file_hash = %s", (rows_inserted, content_hash))
             conn.commit()
-            print(f"   ✅ Success! Inserted {rows_inserted} rows.")
+            load_secs = time.perf_counter() - start - read_secs
+
+            total_rows += rows_inserted
+            total_secs += read_secs + load_secs
+            rate = rows_inserted / load_secs if load_secs > 0 else 0
+            print(f"   ✅ Success! Inserted {rows_inserted} rows "
+                  f"(read {read_secs:.2f}s, load {load_secs:.2f}s, {rate:,.0f} rows/sec).")
 
             # MOVE file to processed folder
-            shutil.move(file_path, os.path.join(processed_path, file_name))
+            move_to_processed(folder_path, processed_path, file_name)
             print(f"   📦 Moved {file_name} to 'processed' folder.")
 
         except Exception as e:
             print(f"   ❌ Error processing file {file_name}: {e}")
             if conn: conn.rollback()
 
-    if cur: cur.close()
+    if total_secs > 0:
+        print(f"📊 {table_name}: {total_rows} rows in {total_secs:.2f}s ({total_rows / total_secs:,.0f} rows/sec overall)")
     if conn: conn.close()
 
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load cleaned trip files into Postgres")
+    parser.add_argument("--mode", choices=["copy", "values"], default=LOAD_MODE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
     print("🚀 Starting Data Import...")
     
     # 1. Process Application Files
     if os.path.exists(APP_FOLDER):
-        process_folder(APP_FOLDER, "application_data_dump")
+        process_folder(APP_FOLDER, "application_data_dump", args.mode, args.batch_size)
     else:
         print(f"⚠️ Folder '{APP_FOLDER}' not found. Please create it.")
 
     # 2. Process Manual Files
     if os.path.exists(MANUAL_FOLDER):
-        process_folder(MANUAL_FOLDER, "manual_data_dump")
+        process_folder(MANUAL_FOLDER, "manual_data_dump", args.mode, args.batch_size)
     else:
         print(f"⚠️ Folder '{MANUAL_FOLDER}' not found. Please create it.")
         
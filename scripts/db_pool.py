@@ -0,0 +1,115 @@
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+# --- POOL SETTINGS ---
+MIN_CONNECTIONS = 1
+MAX_CONNECTIONS = 5
+CHECKOUT_TIMEOUT = 10    # Seconds to wait for a free connection before giving up
+HEALTHCHECK_AFTER = 30   # Only ping connections that sat idle longer than this (seconds)
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 pool shared by every Streamlit session.
+    Blocks (instead of failing) when all connections are busy, pings idle
+    connections on checkout and transparently replaces dead ones.
+    """
+
+    def __init__(self, min_size=MIN_CONNECTIONS, max_size=MAX_CONNECTIONS, **conn_kwargs):
+        self.max_size = max_size
+        self._pool = pg_pool.ThreadedConnectionPool(min_size, max_size, **conn_kwargs)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0, "waits": 0, "wait_secs": 0.0,
+            "checkout_secs": 0.0, "max_checkout_secs": 0.0,
+            "reconnects": 0, "timeouts": 0,
+        }
+
+    def _bump(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < HEALTHCHECK_AFTER:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        start = time.perf_counter()
+
+        # 1. Wait for a free slot (counted as a pool wait if we could not get one immediately)
+        if not self._slots.acquire(blocking=False):
+            self._bump("waits")
+            if not self._slots.acquire(timeout=CHECKOUT_TIMEOUT):
+                self._bump("timeouts")
+                raise pg_pool.PoolError(f"No free DB connection after {CHECKOUT_TIMEOUT}s")
+            self._bump("wait_secs", time.perf_counter() - start)
+
+        # 2. Check out and health-check, reconnecting once if the connection is dead
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                self._pool.putconn(conn, close=True)
+                self._bump("reconnects")
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["checkout_secs"] += elapsed
+            self.stats["max_checkout_secs"] = max(self.stats["max_checkout_secs"], elapsed)
+        return conn
+
+    def putconn(self, conn):
+        try:
+            broken = bool(conn.closed)
+            if not broken:
+                # Never hand out a connection with an open transaction
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self._last_used[id(conn)] = time.monotonic()
+            self._pool.putconn(conn, close=broken)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """with pool.connection() as conn: ... (rolled back on error, always returned)."""
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def snapshot(self):
+        """Copy of the counters plus average checkout latency."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_checkout_ms"] = 1000 * stats["checkout_secs"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def close(self):
+        self._pool.closeall()
@@ -0,0 +1,135 @@
+import sys
+import json
+from datetime import date
+
+from data_loader import get_db_connection, LEDGER_DDL
+from trip_lookup import dump_lookup_query, prefetch_query, records_query, records_page_query
+from travel_rollups import DAILY_DDL, EMPLOYEE_DDL, DAILY_SEED, EMPLOYEE_SEED, dashboard_queries
+
+# --- TABLES ---
+TABLES = [
+    # Content hashes of loaded files (used by data_loader.py)
+    LEDGER_DDL,
+    # Last voucher sequence handed out per day (used by voucher_allocator.py)
+    """CREATE TABLE IF NOT EXISTS voucher_counters (
+        voucher_date DATE PRIMARY KEY,
+        last_seq INTEGER NOT NULL
+    )""",
+    # Seed / catch up from vouchers already in taxi_travels (base numbers only, not the A/B/C splits)
+    r"""INSERT INTO voucher_counters (voucher_date, last_seq)
+        SELECT TO_DATE(LEFT(voucher_no, 8), 'YYYYMMDD'), MAX(SUBSTRING(voucher_no FROM 10)::INT)
+        FROM taxi_travels
+        WHERE voucher_no ~ '^\d{8}-\d+$'
+        GROUP BY 1
+        ON CONFLICT (voucher_date) DO UPDATE
+        SET last_seq = GREATEST(voucher_counters.last_seq, EXCLUDED.last_seq)""",
+    # Dashboard rollups (kept up to date by travel_rollups.py), seeded while empty.
+    # The lock holds saves back until the seed commits so none is counted twice.
+    DAILY_DDL,
+    EMPLOYEE_DDL,
+    "LOCK TABLE taxi_travels IN SHARE MODE",
+    DAILY_SEED,
+    EMPLOYEE_SEED,
+]
+
+# --- INDEXES ---
+# CONCURRENTLY so the app keeps working while a big dump table is indexed.
+INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_app_dump_trip_id ON application_data_dump (trip_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_manual_dump_trip_id_date ON manual_data_dump (trip_id, trip_date)",
+    # Entry tab "prefetch today's trips"
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_app_dump_trip_date ON application_data_dump (trip_date)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_manual_dump_trip_date ON manual_data_dump (trip_date)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_taxi_travels_trip_id_date ON taxi_travels (trip_id, travel_date)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_taxi_travels_travel_date ON taxi_travels (travel_date)",
+    # text_pattern_ops lets "voucher_no LIKE 'YYYYMMDD-%'" use the index under any collation
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_taxi_travels_voucher_prefix ON taxi_travels (voucher_no text_pattern_ops)",
+]
+
+# --- LOOKUPS THAT MUST STAY INDEX SEEKS ---
+# (name, table, sql, params) - params only need the right types for EXPLAIN
+DASHBOARD = dashboard_queries(date.today(), date.today())
+CHECKED_LOOKUPS = [
+    ("application trip lookup", "application_data_dump", *dump_lookup_query("Application", 1234567)),
+    ("manual trip lookup", "manual_data_dump", *dump_lookup_query("Manual", 1234, date.today())),
+    ("application prefetch", "application_data_dump", *prefetch_query("Application", date.today())),
+    ("manual prefetch", "manual_data_dump", *prefetch_query("Manual", date.today())),
+    ("records by trip", "taxi_travels", *records_query(1234567)),
+    ("records by trip and date", "taxi_travels", *records_query(1234567, date.today())),
+    ("records page (keyset)", "taxi_travels", *records_page_query(100000)),
+    ("records page by voucher", "taxi_travels", *records_page_query(None, voucher="20251213")),
+    ("dashboard spend by day", "travel_daily_rollup", *DASHBOARD["spend"]),
+    ("dashboard shift load", "travel_daily_rollup", *DASHBOARD["shifts"]),
+    ("dashboard employee cost", "employee_monthly_rollup", *DASHBOARD["employees"]),
+]
+
+
+def apply_tables(conn):
+    """Creates missing tables, syncs the voucher counters and seeds empty rollups. Safe to run on every deploy."""
+    with conn.cursor() as cur:
+        for sql in TABLES:
+            cur.execute(sql)
+    conn.commit()
+
+
+def apply_indexes(conn):
+    """Creates any missing index. Safe to run on every deploy."""
+    old_autocommit = conn.autocommit
+    conn.autocommit = True  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    try:
+        with conn.cursor() as cur:
+            for sql in INDEXES:
+                print(f"   {sql}")
+                cur.execute(sql)
+    finally:
+        conn.autocommit = old_autocommit
+
+
+def _seq_scanned_tables(plan):
+    """Walks an EXPLAIN (FORMAT JSON) plan and yields every relation read by a Seq Scan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from _seq_scanned_tables(child)
+
+
+def find_seq_scans(conn, lookups=CHECKED_LOOKUPS):
+    """
+    Returns [(name, table)] for every lookup whose plan still scans its table.
+    Seq scans are disabled for the check, so small test tables don't hide a
+    lookup that *cannot* use an index (e.g. a CAST on the indexed column).
+    """
+    failures = []
+    with conn.cursor() as cur:
+        for name, table, sql, params in lookups:
+            cur.execute("SET LOCAL enable_seqscan = off")
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cur.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            if table in _seq_scanned_tables(plan[0]["Plan"]):
+                failures.append((name, table))
+    conn.rollback()
+    return failures
+
+
+# --- MAIN EXECUTION ---
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if not conn: sys.exit(1)
+
+    print("🛠️ Applying tables...")
+    apply_tables(conn)
+
+    print("🛠️ Applying indexes...")
+    apply_indexes(conn)
+
+    print("🔎 Checking lookup plans...")
+    failures = find_seq_scans(conn)
+    conn.close()
+
+    for name, table in failures:
+        print(f"   ❌ {name} falls back to a Seq Scan on {table}")
+    if failures:
+        sys.exit(1)
+    print("   ✅ All lookups use indexes.")
@@ -0,0 +1,207 @@
+import io
+import os
+import tempfile
+from itertools import islice
+import pandas as pd
+import numpy as np
+
+# Columns written with the time format
+TIME_COLUMNS = ['SHIFT_TIME', 'HOME_TIME', 'PICKUP POINT']
+
+# Frames at least this long are streamed to a temp file with constant_memory
+# (one row in RAM at a time) instead of being built in memory.
+STREAMING_ROWS = 20000
+
+# --- SHEET STYLES ---
+# widths: exact column name -> width, width_rules: (substring, width) checked in order
+# Optional: format_rules (substring, format key), text_wrap, time_num_format, date_num_format
+BILLING_STYLE = {
+    'font_size': 13, 'header_height': 30, 'row_height': 30,
+    'widths': {}, 'width_rules': [('ADDRESS', 80), ('EMPLOYEE_NAME', 40)], 'default_width': 25,
+}
+
+OPS_STYLE = {
+    'font_size': 13, 'header_height': 50, 'row_height': 45,
+    'spacer_height': 40, 'repeat_header_height': 50,
+    'widths': {
+        'TRIP_DATE': 13, 'TRIP_ID': 11, 'FLIGHT_NO.': 13, 'EMPLOYEE_ID': 12,
+        'EMPLOYEE_NAME': 23, 'ADDRESS': 110, 'PASSENGER_MOBILE': 14.5, 'LANDMARK': 22,
+        'REPORTING_LOCATION': 14, 'VEHICLE_NO': 15, 'DIRECTION': 12, 'PICKUP POINT': 11,
+        'SHIFT_TIME': 13, 'GUARD': 15,
+    },
+    'width_rules': [], 'default_width': 20,
+}
+
+
+def add_formats(workbook, style):
+    base_props = {
+        'font_size': style['font_size'], 'border': 1, 'align': 'center', 'valign': 'vcenter',
+        'text_wrap': style.get('text_wrap', True),
+    }
+    return {
+        'base': workbook.add_format(base_props),
+        'wrap': workbook.add_format({**base_props, 'text_wrap': True}),
+        'time': workbook.add_format({**base_props, 'num_format': style.get('time_num_format', 'hh:mm')}),
+        'date': workbook.add_format({**base_props, 'num_format': style.get('date_num_format', 'dd-mm-yyyy')}),
+        'header': workbook.add_format({**base_props, 'text_wrap': True, 'bold': True, 'fg_color': '#0070C0', 'font_color': '#FFFFFF'}),
+    }
+
+
+def column_format_key(col_name, style):
+    if col_name in TIME_COLUMNS:
+        return 'time'
+    for token, key in style.get('format_rules', []):
+        if token in str(col_name):
+            return key
+    return 'base'
+
+
+def column_width(col_name, style):
+    name = str(col_name).upper()
+    if name in style['widths']:
+        return style['widths'][name]
+    for token, width in style['width_rules']:
+        if token in name:
+            return width
+    return style['default_width']
+
+
+def format_segments(columns, formats, style):
+    """
+    Groups neighbouring columns that share a format into (first_col, last_col + 1, format)
+    so each data row is written with a few write_row calls instead of one write per cell.
+    """
+    segments = []
+    for col_num, col_name in enumerate(columns):
+        fmt = formats[column_format_key(col_name, style)]
+        if segments and segments[-1][2] is fmt:
+            segments[-1][1] = col_num + 1
+        else:
+            segments.append([col_num, col_num + 1, fmt])
+    return segments
+
+
+def order_by_trip(df, key='TRIP_ID'):
+    """
+    Rows grouped by key, trips in order of first appearance and rows in their original
+    order inside each trip (what groupby(key, sort=False) gives). Rows without a key are
+    dropped, like groupby does. One stable argsort instead of one frame per trip.
+    """
+    codes, _ = pd.factorize(df[key])
+    rows = np.flatnonzero(codes >= 0)
+    return df.iloc[rows[np.argsort(codes[rows], kind='stable')]].reset_index(drop=True)
+
+
+def trip_plan(df, key='TRIP_ID'):
+    """
+    Row plan for an Ops sheet of a trip-ordered frame (see order_by_trip()): every trip's rows
+    as one ('data', start, stop) block, with a blank row and a repeated header row before
+    each next trip: ('spacer', i, i), ('header', i, i) where i is that trip's first row.
+    The separator rows are not in df; write_frame() draws them. Trip boundaries come
+    from one vectorized comparison.
+    """
+    if df.empty:
+        return []
+    if key not in df.columns:
+        return [('data', 0, len(df))]
+
+    codes, _ = pd.factorize(df[key])
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(df)]
+    plan = []
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        if plan:
+            plan += [('spacer', start, start), ('header', start, start)]
+        plan.append(('data', start, stop))
+    return plan
+
+
+def frame_rows(df, chunk_size=10000):
+    """
+    Row tuples with NaN/NaT turned into None (written as formatted blank cells).
+    Converted a chunk at a time so a big frame is never copied whole.
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield from chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def apply_column_widths(worksheet, columns, style):
+    for col_num, col_name in enumerate(columns):
+        worksheet.set_column(col_num, col_num, column_width(col_name, style), None)
+
+
+def write_frame(worksheet, df, style, formats, plan=None):
+    """
+    Writes df (header row + data) into worksheet in row order, so it also works
+    with xlsxwriter's constant_memory mode. plan is a trip_plan(); None means all data.
+    """
+    columns = list(df.columns)
+
+    # --- HEADER (Row 0) ---
+    worksheet.set_row(0, style['header_height'])
+    worksheet.write_row(0, 0, columns, formats['header'])
+
+    # --- DATA (Rows 1 to N) ---
+    segments = format_segments(columns, formats, style)
+    row_height = style['row_height']
+    plan = plan if plan is not None else [('data', 0, len(df))]
+
+    rows = frame_rows(df)
+    excel_row = 1
+    for kind, start, stop in plan:
+        if kind == 'spacer':
+            worksheet.set_row(excel_row, style['spacer_height'])
+            excel_row += 1
+        elif kind == 'header':
+            worksheet.set_row(excel_row, style['repeat_header_height'])
+            worksheet.write_row(excel_row, 0, columns, formats['header'])
+            excel_row += 1
+        else:
+            for row in islice(rows, stop - start):
+                worksheet.set_row(excel_row, row_height)
+                for first, last, fmt in segments:
+                    worksheet.write_row(excel_row, first, row[first:last], fmt)
+                excel_row += 1
+
+
+def write_excel(df, style, target, plan=None, constant_memory=False):
+    """Writes the formatted sheet to target (a path or a BytesIO)."""
+    options = {'constant_memory': True} if constant_memory else {}
+    writer = pd.ExcelWriter(target, engine='xlsxwriter', engine_kwargs={'options': options})
+    worksheet = writer.book.add_worksheet('Sheet1')
+    apply_column_widths(worksheet, df.columns, style)
+    write_frame(worksheet, df, style, add_formats(writer.book, style), plan)
+    writer.close()
+
+
+def read_and_remove(path):
+    """Returns a finished temp workbook as BytesIO (for st.download_button) and deletes the file."""
+    try:
+        with open(path, 'rb') as f:
+            return io.BytesIO(f.read())
+    finally:
+        os.remove(path)
+
+
+def temp_xlsx_path():
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    return path
+
+
+def export_excel(df, style, plan=None):
+    """
+    Builds the formatted workbook and returns a BytesIO.
+    Big frames go through a constant_memory temp file, so peak memory is the
+    finished (zipped) file instead of every cell of the workbook.
+    """
+    if len(df) >= STREAMING_ROWS:
+        path = temp_xlsx_path()
+        write_excel(df, style, path, plan, constant_memory=True)
+        return read_and_remove(path)
+
+    output = io.BytesIO()
+    write_excel(df, style, output, plan)
+    output.seek(0)
+    return output
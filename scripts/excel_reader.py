@@ -0,0 +1,155 @@
+import os
+import json
+import hashlib
+import importlib.util
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------
+# One place where every script reads Excel.
+# - Engine: calamine (Rust, much faster) when python-calamine is installed,
+#   otherwise openpyxl for .xlsx and xlrd for legacy .xls.
+#   If an engine cannot open a file, the next one is tried.
+# - Cache: with a cache dir (EXCEL_CACHE_DIR or cache_dir=...), the parsed
+#   sheet is stored by file hash, so re-running over the same raw sheet
+#   skips Excel parsing entirely.
+# ---------------------------------------------------------
+
+HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+
+# Engines pandas falls back to, per file type (used without calamine or when it fails)
+FALLBACK_ENGINES = {
+    ".xls": "xlrd",
+    ".xlsx": "openpyxl",
+    ".xlsm": "openpyxl",
+    ".xlsb": "pyxlsb",
+    ".ods": "odf",
+}
+
+CACHE_DIR = os.environ.get("EXCEL_CACHE_DIR")
+
+# Cell texts pandas' readers (read_csv / read_excel) treat as missing by default
+NA_TOKENS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """SHA-256 of the file bytes (the workbook itself is never parsed)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_name(source):
+    """File name of a path or an uploaded file (st.file_uploader objects have .name)."""
+    return source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+
+
+def source_bytes(source):
+    """Whole content of an uploaded file / buffer, leaving it rewound."""
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+def engines_for(source):
+    ext = os.path.splitext(str(source_name(source)))[1].lower()
+    fallback = FALLBACK_ENGINES.get(ext)
+    engines = ["calamine"] if HAS_CALAMINE else []
+    if fallback:
+        engines.append(fallback)
+    # Unknown extension (e.g. a BytesIO): let pandas sniff the format
+    return engines or [None]
+
+
+def parse_excel(source, **kwargs):
+    """pd.read_excel with the fastest engine that can open the file."""
+    error = None
+    for engine in engines_for(source):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        try:
+            return pd.read_excel(source, engine=engine, **kwargs)
+        except Exception as e:
+            error = e
+    raise error
+
+
+# --- PARSED SHEET CACHE ---
+def has_function(value):
+    """True if an option holds a function (usecols=lambda c: ..., converters={...: func})."""
+    if isinstance(value, dict):
+        return any(has_function(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return any(has_function(v) for v in value)
+    return callable(value) and not isinstance(value, type)
+
+
+def option_name(value):
+    # Types (dtype=str, converters={...: int}) by full name; anything else by repr
+    if isinstance(value, type):
+        return f"{value.__module__}.{value.__qualname__}"
+    return repr(value)
+
+
+def cache_key(source, kwargs):
+    if isinstance(source, (str, os.PathLike)):
+        content = file_hash(source)
+    else:
+        content = hashlib.sha256(source_bytes(source)).hexdigest()
+    # Same file read with other options (header=None, usecols ...) is a different frame
+    options = json.dumps(kwargs, sort_keys=True, default=option_name)
+    return hashlib.sha256(f"{content}:{options}".encode()).hexdigest()
+
+
+def read_cached(cache_dir, key):
+    parquet_path = os.path.join(cache_dir, f"{key}.parquet")
+    pickle_path = os.path.join(cache_dir, f"{key}.pkl")
+    if os.path.exists(parquet_path):
+        df = pd.read_parquet(parquet_path)
+        # Parquet gives None for empty text cells; read_excel gives NaN (str() differs: 'None' vs 'nan')
+        text_cols = df.select_dtypes(include=["object"]).columns
+        df[text_cols] = df[text_cols].where(df[text_cols].notna(), np.nan)
+        return df
+    if os.path.exists(pickle_path):
+        return pd.read_pickle(pickle_path)
+    return None
+
+
+def write_cached(cache_dir, key, df):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.parquet")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+    except Exception:
+        # Raw sheets (header=None) have int column names and mixed int/text
+        # columns, which Parquet cannot store: keep those as pickles instead
+        path = os.path.join(cache_dir, f"{key}.pkl")
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_excel(source, cache_dir=CACHE_DIR, **kwargs):
+    """
+    Drop-in for pd.read_excel(source, **kwargs) (path or uploaded file).
+    Pass usecols to parse only the columns a script needs. Reads with a function
+    option (usecols=lambda ..., converters) skip the cache.
+    """
+    # A function has no stable key (every lambda is '<lambda>'): never cache those reads
+    if not cache_dir or any(has_function(v) for v in kwargs.values()):
+        return parse_excel(source, **kwargs)
+
+    key = cache_key(source, kwargs)
+    df = read_cached(cache_dir, key)
+    if df is None:
+        df = parse_excel(source, **kwargs)
+        write_cached(cache_dir, key, df)
+    return df
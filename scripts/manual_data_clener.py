@@ -1,14 +1,13 @@
 import re
 import os
+import argparse
 import pandas as pd
 import numpy as np
-import os
-import io
-import re
-import shutil
-import pandas as pd
-import numpy as np
-import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+from excel_reader import read_excel, NA_TOKENS
+from batch_runner import find_excel_files, run_batch, atomic_output
+from text_normalize import clean_text, normalize_frame, to_arrow_text
 
 # ------------------- CONFIGURATION --------------------
 BASE_DIR = r"D:\my_projects\air-india-data\data-dec-2025"
@@ -22,27 +21,62 @@ os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
 pd.set_option('future.no_silent_downcasting', True)
 
+NA_TEXT = pa.array(NA_TOKENS, type=pa.string())
+
+def typed_columns(raw_df):
+    """
+    Column types for the manual layout, inferred per column the way a CSV re-parse would:
+    NA tokens -> NaN, text columns holding only numbers -> numeric, date columns -> text,
+    whitespace-only text -> NaN.
+    """
+    df = raw_df.copy()
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            df[col] = values.astype(str).where(values.notna())
+            continue
+        if values.dtype != object:
+            continue
+
+        # The column's cells as text once (what to_csv wrote); NA tokens and blanks are Arrow kernels on it
+        text = to_arrow_text(values)
+        missing = pc.fill_null(pc.is_in(text, value_set=NA_TEXT), True)
+        values = values.mask(missing.to_numpy(zero_copy_only=False))
+        if pd.api.types.infer_dtype(values, skipna=True) != 'boolean':
+            try:
+                # Raises on the first text cell, so text columns are rejected almost for free
+                df[col] = pd.to_numeric(values)
+                continue
+            except (ValueError, TypeError):
+                pass
+        # Blank check runs after type inference: a stray ' ' keeps a column as text, like read_csv did
+        blank = pc.fill_null(pc.utf8_is_space(text), False)
+        df[col] = values.mask(blank.to_numpy(zero_copy_only=False))
+    return df
+
+def parse_manual_sheet(raw_df):
+    """
+    Typed parse of a raw sheet: the same frame the old "CSV Trick" (to_csv + read_csv)
+    produced, without serializing and re-parsing every cell.
+    """
+    df = typed_columns(raw_df)
+
+    # Basic Cleanup
+    return df.dropna(how='all').reset_index(drop=True)
+
 def clean_excel_file(file_path, filename):
     """
     Reads a raw Excel file, applies cleaning logic, and returns a clean DataFrame.
     """
     try:
         # --- STEP 1: LOAD DIRTY DATA ---
-        raw_df = pd.read_excel(file_path, header=None)
+        raw_df = read_excel(file_path, header=None)
         
         if raw_df.empty:
             print(f"Skipping empty file: {filename}")
             return None
 
-        # The "CSV Trick"
-        csv_buffer = io.StringIO()
-        raw_df.to_csv(csv_buffer, index=False, header=False)
-        csv_buffer.seek(0)
-        df = pd.read_csv(csv_buffer, header=None)
-
-        # Basic Cleanup
-        df = df.replace(r'^\s*$', np.nan, regex=True)
-        df = df.dropna(how='all').reset_index(drop=True)
+        df = parse_manual_sheet(raw_df)
 
         # --- STEP 2: EXTRACT METADATA ---
         # A. Reporting Location
@@ -82,11 +116,12 @@ def clean_excel_file(file_path, filename):
         date_obj = pd.to_datetime(file_date_str, dayfirst=True, errors='coerce')
         df['DATE'] = date_obj.date() if pd.notnull(date_obj) else np.nan
 
-        df['SHIFT_TIME'] = df['SHIFT_TIME'].astype(str).str.strip()
+        df['SHIFT_TIME'] = clean_text(df['SHIFT_TIME'], upper=False)
         temp_date_str = date_obj.strftime('%Y-%m-%d') if pd.notnull(date_obj) else ""
         df['temp_combined'] = temp_date_str + ' ' + df['SHIFT_TIME']
         
-        df['REPORTING_TIME'] = pd.to_datetime(df['temp_combined'], errors='coerce')
+        # ISO8601: shift cells mix 'HH:MM:SS' (Excel times) and 'HH:MM' (typed text)
+        df['REPORTING_TIME'] = pd.to_datetime(df['temp_combined'], format='ISO8601', errors='coerce')
 
         # --- STEP 5: TYPE CONVERSION ---
         cols_to_numeric = ['EMPLOYEE_ID', 'CAB_4_DIGIT']
@@ -94,8 +129,7 @@ def clean_excel_file(file_path, filename):
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
 
-        str_cols = df.select_dtypes(include=['object']).columns
-        df[str_cols] = df[str_cols].apply(lambda x: x.astype(str).str.strip().str.upper())
+        df = normalize_frame(df)
 
         # --- STEP 6: REORDER ---
         desired_order = [
@@ -111,59 +145,57 @@ def clean_excel_file(file_path, filename):
         print(f"Error processing {filename}: {e}")
         return None
 
+def output_filename_for(cleaned_df, file):
+    # Grab the date from the first row
+    first_date = cleaned_df['DATE'].iloc[0]
+    
+    # --- FIX IS HERE ---
+    # We force convert it back to a datetime object before formatting
+    # This works whether 'first_date' is a String OR a Date object
+    if pd.notnull(first_date):
+        date_str = pd.to_datetime(first_date).strftime("%Y%m%d")
+        return f"manual_PICKUP_{date_str}.xlsx"
+    return f"manual_PICKUP_UNKNOWN_{file}"
+
+def clean_and_save(file_path):
+    """
+    Cleans one raw manual sheet and saves it into DESTINATION_FOLDER.
+    Returns (output_path, rows) or None (empty / unreadable / save error).
+    """
+    file = os.path.basename(file_path)
+    print(f"Processing: {file}...")
+
+    # 1. CLEAN THE DATA
+    cleaned_df = clean_excel_file(file_path, file)
+    if cleaned_df is None or cleaned_df.empty:
+        print(f"   -> Skipped (Empty or Error)")
+        return None
+
+    # 2. SAVE INDIVIDUALLY (temp file + rename, so a crash never leaves half a file)
+    try:
+        output_filename = output_filename_for(cleaned_df, file)
+        output_path = os.path.join(DESTINATION_FOLDER, output_filename)
+        with atomic_output(output_path) as tmp_path:
+            cleaned_df.to_excel(tmp_path, index=False)
+        print(f"   -> Saved to: {output_filename}")
+        return output_path, len(cleaned_df)
+    except Exception as save_err:
+        print(f"   -> Error saving: {save_err}")
+        return None
+
 # ------------------- MAIN EXECUTION --------------------
 if __name__ == "__main__":
-    print(f"Scanning folder: {SOURCE_FOLDER}...\n")
-    
-    files_processed_count = 0
+    parser = argparse.ArgumentParser(description="Clean raw manual operation sheets in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: all cores, 1 = no pool)")
+    args = parser.parse_args()
 
-    for root, dirs, files in os.walk(SOURCE_FOLDER):
-        if "processed" in root:
-            continue
+    print(f"Scanning folder: {SOURCE_FOLDER}...\n")
+    files = find_excel_files(SOURCE_FOLDER, skip_dirs=("processed",))
 
-        for file in files:
-            if file.endswith(('.xls', '.xlsx')):
-                file_path = os.path.join(root, file)
-                print(f"Processing: {file}...")
-
-                # 1. CLEAN THE DATA
-                cleaned_df = clean_excel_file(file_path, file)
-
-                # 2. SAVE INDIVIDUALLY
-                if cleaned_df is not None and not cleaned_df.empty:
-                    try:
-                        # Grab the date from the first row
-                        first_date = cleaned_df['DATE'].iloc[0]
-                        
-                        # --- FIX IS HERE ---
-                        # We force convert it back to a datetime object before formatting
-                        # This works whether 'first_date' is a String OR a Date object
-                        if pd.notnull(first_date):
-                            date_str = pd.to_datetime(first_date).strftime("%Y%m%d")
-                            output_filename = f"manual_PICKUP_{date_str}.xlsx"
-                        else:
-                            output_filename = f"manual_PICKUP_UNKNOWN_{file}"
-                        # -------------------
-
-                        output_path = os.path.join(DESTINATION_FOLDER, output_filename)
-                        
-                        # Save the individual file
-                        cleaned_df.to_excel(output_path, index=False)
-                        print(f"   -> Saved to: {output_filename}")
-
-                        # 3. MOVE RAW FILE TO PROCESSED FOLDER
-                        shutil.move(file_path, os.path.join(PROCESSED_FOLDER, file))
-                        print(f"   -> Moved raw file to 'processed'")
-                        
-                        files_processed_count += 1
-                        
-                    except Exception as save_err:
-                        print(f"   -> Error saving/moving: {save_err}")
-                else:
-                    print(f"   -> Skipped (Empty or Error)")
-
-    print("-" * 40)
-    if files_processed_count == 0:
+    if not files:
         print("No valid files found to process.")
     else:
-        print(f"Processing complete. {files_processed_count} files saved individually.")
\ No newline at end of file
+        # 3. Raw files are moved to PROCESSED_FOLDER only after their output was saved
+        summary = run_batch(clean_and_save, files, PROCESSED_FOLDER, args.workers)
+        saved = sum(1 for _, ok, _, _ in summary if ok)
+        print(f"Processing complete. {saved} files saved individually.")
@@ -1,37 +1,238 @@
 import pandas as pd
 import glob
 import os
+import sys
+import time
+import argparse
+from datetime import datetime, date, time as dtime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import xlsxwriter
+import pyarrow as pa
+import pyarrow.parquet as pq
+from excel_reader import read_excel
+from excel_export import frame_rows
 
 folder_path = r"D:\my_projects\air-india-data\data-dec-2025\app_operation_data"
 
-# Find both xlsx and xls files
-xlsx_files = glob.glob(os.path.join(folder_path, "*.xlsx"))
-xls_files = glob.glob(os.path.join(folder_path, "*.xls"))
+# Streaming merge: files are read one at a time (or a few ahead with --workers)
+# and appended straight to the output, so memory stays at a couple of files
+# no matter how many sheets the month has.
 
-all_files = xlsx_files + xls_files
+EXCEL_MAX_ROWS = 1048576  # Rows per sheet in .xlsx (header included)
 
-print(f"Found {len(all_files)} Excel files")
-for f in all_files:
-    print(" -", f)
+# Same cell styles pandas' to_excel used for the old combined_output.xlsx
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+DATE_FORMAT = 'yyyy-mm-dd'
+TIME_FORMAT = 'hh:mm:ss'
 
-if not all_files:
-    raise FileNotFoundError("No Excel (.xlsx or .xls) files found!")
 
-# Read and combine
-df_list = []
-for file in all_files:
-    if file.lower().endswith(".xls"):
-        df = pd.read_excel(file, engine="xlrd")
-    else:
-        df = pd.read_excel(file, engine="openpyxl")
+def find_files(folder):
+    # Find both xlsx and xls files
+    xlsx_files = glob.glob(os.path.join(folder, "*.xlsx"))
+    xls_files = glob.glob(os.path.join(folder, "*.xls"))
+    return xlsx_files + xls_files
+
+
+def read_timed(file):
+    start = time.perf_counter()
+    df = read_excel(file)
+    return df, time.perf_counter() - start
+
+
+def read_in_order(files, workers=1):
+    """
+    Yields (file, df, secs, error) in file order. With workers > 1 the next files
+    are parsed in other processes meanwhile, but never more than `workers` ahead.
+    """
+    if workers <= 1:
+        for file in files:
+            try:
+                yield (file, *read_timed(file), None)
+            except Exception as e:
+                yield file, None, 0, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        queue, pending = iter(files), deque()
+
+        def submit_next():
+            upcoming = next(queue, None)
+            if upcoming:
+                pending.append((upcoming, pool.submit(read_timed, upcoming)))
+
+        for _ in range(workers):
+            submit_next()
+        while pending:
+            file, future = pending.popleft()
+            submit_next()
+            try:
+                yield (file, *future.result(), None)
+            except Exception as e:
+                yield file, None, 0, e
+
+
+def align_columns(df, columns):
+    """Reorders df to the first file's columns. Returns (df, missing, extra)."""
+    missing = [c for c in columns if c not in df.columns]
+    extra = [c for c in df.columns if c not in columns]
+    return df.reindex(columns=columns), missing, extra
+
+
+# --- WRITERS ---
+class ExcelAppender:
+    """Appends frames to one sheet in constant_memory mode (each row goes straight to disk)."""
+
+    def __init__(self, path, first_df):
+        self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        self.worksheet = self.workbook.add_worksheet('Sheet1')
+        self.worksheet.write_row(0, 0, [str(c) for c in first_df.columns], self.workbook.add_format(HEADER_FORMAT))
+        self.segments = self.column_segments(first_df)
+        self.row = 1
+
+    def column_segments(self, df):
+        """(first_col, last_col + 1, format) runs; date/time columns get a number format."""
+        formats = {key: self.workbook.add_format({'num_format': fmt}) for key, fmt in
+                   [('datetime', DATETIME_FORMAT), ('date', DATE_FORMAT), ('time', TIME_FORMAT)]}
+        segments = []
+        for col_num, col in enumerate(df.columns):
+            values = df[col].dropna()
+            first = values.iloc[0] if not values.empty else None
+            # datetime is a subclass of date, so it is checked first
+            if pd.api.types.is_datetime64_any_dtype(df[col]) or isinstance(first, datetime):
+                fmt = formats['datetime']
+            elif isinstance(first, date):
+                fmt = formats['date']
+            elif isinstance(first, dtime):
+                fmt = formats['time']
+            else:
+                fmt = None
+            if segments and segments[-1][2] is fmt:
+                segments[-1][1] = col_num + 1
+            else:
+                segments.append([col_num, col_num + 1, fmt])
+        return segments
+
+    def prepare(self, df):
+        """Checks and converts a frame before any of its rows are written: [row tuple]."""
+        if self.row + len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"more than {EXCEL_MAX_ROWS} rows do not fit in one .xlsx sheet, use --format parquet")
+        return list(frame_rows(df))
+
+    def write(self, rows):
+        for values in rows:
+            for first, last, fmt in self.segments:
+                self.worksheet.write_row(self.row, first, values[first:last], fmt)
+            self.row += 1
+
+    def close(self):
+        self.workbook.close()
 
-    df_list.append(df)
 
-combined_df = pd.concat(df_list, ignore_index=True)
+class ParquetAppender:
+    """Appends frames as row groups of one Parquet file, cast to the first file's schema."""
 
-# Save output as xlsx
-output_path = os.path.join(folder_path, "combined_output.xlsx")
-combined_df.to_excel(output_path, index=False)
+    def __init__(self, path, first_df):
+        self.path = path
+        self.writer = None
 
-print("✅ Excel files (.xls + .xlsx) combined successfully!")
-print(f"Output saved to: {output_path}")
+    def prepare(self, df):
+        """Converts a frame to an Arrow table in the output schema before anything is written."""
+        # Text columns can hold numbers on some rows: store them as strings
+        text_cols = df.select_dtypes(include=['object']).columns
+        df = df.astype({c: 'string' for c in text_cols})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is not None:
+            # Raises if a column can't be converted (e.g. text in a number column)
+            table = table.cast(self.writer.schema)
+        return table
+
+    def write(self, table):
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+WRITERS = {'xlsx': ExcelAppender, 'parquet': ParquetAppender}
+
+
+def merge_files(files, output_path, fmt='xlsx', workers=1):
+    """
+    Streams every file into output_path. Returns [(name, rows, secs, error)].
+    A file is aligned and converted (writer.prepare) before any of its rows are written,
+    so a file that fails there is skipped whole. Only an error in the write itself
+    (disk full, a cell value xlsxwriter rejects) can leave part of a file in the output.
+    No output file is left behind when no file could be merged.
+    """
+    writer, columns, report = None, None, []
+    start = time.perf_counter()
+    try:
+        for file, df, secs, error in read_in_order(files, workers):
+            name = os.path.basename(file)
+            if error is None:
+                try:
+                    if writer is None:
+                        # The first readable file fixes the column layout
+                        columns = list(df.columns)
+                        writer = WRITERS[fmt](output_path, df)
+                    df, missing, extra = align_columns(df, columns)
+                    if missing or extra:
+                        print(f"   ⚠️ {name}: missing {missing}, dropped extra {extra}")
+                    writer.write(writer.prepare(df))
+                except Exception as e:
+                    error = e
+
+            if error is None:
+                print(f"   ✅ {name}: {len(df)} rows (read {secs:.2f}s)")
+                report.append((name, len(df), secs, None))
+            else:
+                print(f"   ❌ {name}: skipped ({error})")
+                report.append((name, 0, secs, error))
+    finally:
+        if writer:
+            writer.close()
+
+    total_rows = sum(rows for _, rows, _, _ in report)
+    merged = sum(1 for *_, error in report if error is None)
+    if writer and not merged and os.path.exists(output_path):
+        # Every readable file failed to convert: don't leave a header-only output behind
+        os.remove(output_path)
+    print(f"📊 {merged}/{len(files)} files, {total_rows} rows in {time.perf_counter() - start:.2f}s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge every Excel file in a folder into one file")
+    parser.add_argument("--folder", default=folder_path)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="xlsx", help="Output type (parquet has no row limit)")
+    parser.add_argument("--workers", type=int, default=1, help="Files parsed ahead in parallel (1 = one at a time)")
+    args = parser.parse_args()
+
+    all_files = find_files(args.folder)
+
+    print(f"Found {len(all_files)} Excel files")
+    for f in all_files:
+        print(" -", f)
+
+    if not all_files:
+        raise FileNotFoundError("No Excel (.xlsx or .xls) files found!")
+
+    # Save output as xlsx (or parquet)
+    output_path = os.path.join(args.folder, f"combined_output.{args.format}")
+    report = merge_files([f for f in all_files if os.path.abspath(f) != os.path.abspath(output_path)],
+                         output_path, args.format, args.workers)
+
+    skipped = [name for name, _, _, error in report if error is not None]
+    if len(skipped) == len(report):
+        print("❌ No file could be merged, nothing saved.")
+        sys.exit(1)
+    if skipped:
+        print(f"⚠️ Combined without {len(skipped)} file(s): {', '.join(skipped)}")
+    else:
+        print("✅ Excel files (.xls + .xlsx) combined successfully!")
+    print(f"Output saved to: {output_path}")
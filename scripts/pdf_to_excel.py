@@ -1,35 +1,168 @@
+import io
+import os
+import hashlib
+import argparse
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import pandas as pd
 
-# --- PATHS (adjust only if yours are different) ---
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# Scanned vendor bill (PDF) -> Excel table.
+# Pages are rasterized one at a time inside the workers (first_page/last_page),
+# OCR'd in parallel, and rebuilt into rows and columns from the word positions
+# tesseract reports (image_to_data), so columns with spaces inside a cell stay together.
+# Usage: python scripts/pdf_to_excel.py scanned.pdf -o output.xlsx --workers 4
+
+# --- PATHS (Windows installs; override with --tesseract-cmd / --poppler-path) ---
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 POPPLER_PATH = r"C:\poppler-25.12.0\Library\bin"
 
-PDF_FILE = "scanned.pdf"
-OUTPUT_EXCEL = "output.xlsx"
+DPI = 300
+LANG = "eng"
+CACHE_DIR = ".ocr_cache"
+
+# Words whose vertical centres are within ROW_SNAP word-heights share a row;
+# a gap wider than CELL_GAP word-heights starts a new cell; cells whose left
+# edges are closer than COLUMN_SNAP word-heights share a column.
+ROW_SNAP = 0.5
+CELL_GAP = 1.2
+COLUMN_SNAP = 2.0
+
+
+def existing_path(path):
+    """Keep the default install paths only on machines that have them (else use PATH)."""
+    return path if path and os.path.exists(path) else None
+
+
+def init_worker(tesseract_cmd):
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+# --- OCR (runs in the worker processes) ---
+def ocr_page(pdf_file, page, dpi=DPI, lang=LANG, poppler_path=None, cache_dir=CACHE_DIR):
+    """Rasterizes one page and returns tesseract's word table (TSV), cached by page image hash."""
+    image = convert_from_path(pdf_file, dpi=dpi, first_page=page, last_page=page, poppler_path=poppler_path)[0]
+
+    key = hashlib.sha256(image.tobytes() + f"{image.size}:{lang}".encode()).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{key}.tsv") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            return page, f.read()
+
+    tsv = pytesseract.image_to_data(image, lang=lang)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(tsv)
+        os.replace(tmp_path, cache_path)
+    return page, tsv
+
+
+# --- TABLE REBUILD ---
+def words_frame(tsv):
+    """image_to_data TSV -> one row per recognised word."""
+    words = pd.read_csv(io.StringIO(tsv), sep="\t", quoting=3, keep_default_na=False, dtype={"text": str})
+    words = words[(words["level"] == 5) & (words["text"].str.strip() != "")]
+    return words.assign(middle=words["top"] + words["height"] / 2).sort_values(["middle", "left"])
+
+
+def row_groups(words, snap):
+    """
+    Splits words (sorted by vertical centre) into printed rows: [row frame sorted by left].
+    Tesseract often puts each table column in its own block, so its block/line
+    numbers cannot be used: a row is every word whose centre is within snap of
+    the row's first word.
+    """
+    rows, start, first = [], 0, None
+    middles = words["middle"].tolist()
+    for i, middle in enumerate(middles):
+        if first is None:
+            first = middle
+        elif middle - first > snap:
+            rows.append(words.iloc[start:i])
+            start, first = i, middle
+    rows.append(words.iloc[start:])
+    return [row.sort_values("left") for row in rows]
+
+
+def line_cells(line, gap):
+    """Joins neighbouring words of one line into cells: [(left, text)]."""
+    cells = []
+    right = None
+    for left, width, text in zip(line["left"], line["width"], line["text"]):
+        if cells and left - right <= gap:
+            cells[-1][1] += " " + text
+        else:
+            cells.append([left, text])
+        right = left + width
+    return cells
+
+
+def page_rows(tsv):
+    """Words of one page -> table rows, cells placed in columns by their left edge."""
+    words = words_frame(tsv)
+    if words.empty:
+        return []
+
+    height = words["height"].median()
+    lines = [line_cells(line, CELL_GAP * height) for line in row_groups(words, ROW_SNAP * height)]
+
+    # Column starts: cluster every cell's left edge across the page
+    lefts = sorted(left for cells in lines for left, _ in cells)
+    starts = [lefts[0]]
+    for left in lefts[1:]:
+        if left - starts[-1] > COLUMN_SNAP * height:
+            starts.append(left)
+
+    rows = []
+    for cells in lines:
+        row = [None] * len(starts)
+        for left, text in cells:
+            col = bisect_right(starts, left) - 1
+            row[col] = text if row[col] is None else f"{row[col]} {text}"
+        rows.append(row)
+    return rows
+
+
+def pdf_to_table(pdf_file, workers=None, dpi=DPI, lang=LANG, tesseract_cmd=None, poppler_path=None, cache_dir=CACHE_DIR):
+    """OCRs every page on a process pool and returns the rebuilt table."""
+    pages = pdfinfo_from_path(pdf_file, poppler_path=poppler_path)["Pages"]
+    workers = workers or os.cpu_count() or 1
+    print(f"📄 {pdf_file}: {pages} pages, {workers} workers")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(tesseract_cmd,)) as pool:
+        futures = [pool.submit(ocr_page, pdf_file, page, dpi, lang, poppler_path, cache_dir) for page in range(1, pages + 1)]
+        for future in futures:
+            page, tsv = future.result()
+            results[page] = page_rows(tsv)
+            print(f"   ✅ Page {page}: {len(results[page])} rows")
 
-# --- Convert PDF to images ---
-images = convert_from_path(
-    PDF_FILE,
-    dpi=300,
-    poppler_path=POPPLER_PATH
-)
+    # Pages can detect a different number of columns: pad to the widest
+    frames = [pd.DataFrame(results[page]) for page in sorted(results) if results[page]]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-data = []
 
-# --- OCR each page ---
-for img in images:
-    text = pytesseract.image_to_string(img, lang="eng")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR a scanned PDF table into Excel")
+    parser.add_argument("pdf_file")
+    parser.add_argument("-o", "--output", help="Excel file to write (default: next to the PDF)")
+    parser.add_argument("--workers", type=int, default=None, help="OCR processes (default: all cores)")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--lang", default=LANG)
+    parser.add_argument("--tesseract-cmd", default=existing_path(TESSERACT_CMD))
+    parser.add_argument("--poppler-path", default=existing_path(POPPLER_PATH))
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Per-page OCR cache ('' to disable)")
+    args = parser.parse_args()
 
-    for line in text.split("\n"):
-        if line.strip():
-            # Split by multiple spaces (better for tables)
-            row = line.split()
-            data.append(row)
+    output_excel = args.output or os.path.splitext(args.pdf_file)[0] + ".xlsx"
+    df = pdf_to_table(args.pdf_file, args.workers, args.dpi, args.lang,
+                      args.tesseract_cmd, args.poppler_path, args.cache_dir)
 
-# --- Save to Excel ---
-df = pd.DataFrame(data)
-df.to_excel(OUTPUT_EXCEL, index=False)
+    # --- Save to Excel ---
+    df.to_excel(output_excel, index=False)
 
-print("✅ DONE! Excel file created:", OUTPUT_EXCEL)
+    print("✅ DONE! Excel file created:", output_excel)
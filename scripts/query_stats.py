@@ -0,0 +1,158 @@
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Per-query timings for the webapp (one QueryStats per server process, see
+# get_query_stats() in taxi_data_entry_webapp.py). Every named query records
+# how long the pool checkout (connect), execute and fetch took and how many rows
+# came back. Queries slower than SLOW_QUERY_MS are logged with their parameter
+# values redacted (types only), since they hold employee names and IDs.
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PHASES = ("connect", "execute", "fetch")
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+SLOW_LOG_SIZE = 100
+
+logger = logging.getLogger("taxi.queries")
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds); the last bucket is open-ended."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th fraction of samples (never above the max seen)."""
+        if not self.count:
+            return 0.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return min(float(self.buckets[i]), self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+
+def redact(params):
+    """Parameter types only, e.g. (int, date) - values never reach the log."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return tuple(type(value).__name__ for value in params)
+
+
+class QueryTimer:
+    """Collects the phases of one query; created by QueryStats.measure()."""
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += 1000 * (time.perf_counter() - start)
+
+
+class QueryStats:
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._queries = {}
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+    def _entry(self, name):
+        if name not in self._queries:
+            self._queries[name] = {
+                "calls": 0, "errors": 0, "rows": 0,
+                "total": Histogram(), **{phase: Histogram() for phase in PHASES},
+            }
+        return self._queries[name]
+
+    @contextmanager
+    def measure(self, name, params=None):
+        """
+        with stats.measure("trip lookup", params) as q:
+            with q.phase("connect"): ...
+            with q.phase("execute"): ...
+            q.rows = n
+        Errors are counted and re-raised.
+        """
+        timer = QueryTimer()
+        error = None
+        try:
+            yield timer
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.record(name, timer, params, error)
+
+    def record(self, name, timer, params=None, error=None):
+        total_ms = sum(timer.phases.values())
+        with self._lock:
+            entry = self._entry(name)
+            entry["calls"] += 1
+            entry["rows"] += timer.rows
+            entry["errors"] += error is not None
+            entry["total"].add(total_ms)
+            for phase, ms in timer.phases.items():
+                entry[phase].add(ms)
+
+        if error is not None:
+            logger.error("query %s failed after %.1f ms params=%s: %s", name, total_ms, redact(params), error)
+        elif total_ms >= self.slow_ms:
+            phases = ", ".join(f"{phase}={ms:.1f}" for phase, ms in timer.phases.items())
+            logger.warning("slow query %s: %.1f ms (%s) rows=%d params=%s",
+                           name, total_ms, phases, timer.rows, redact(params))
+            self.slow_log.append({
+                "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "query": name,
+                "total_ms": round(total_ms, 1), **{f"{p}_ms": round(ms, 1) for p, ms in timer.phases.items()},
+                "rows": timer.rows, "params": str(redact(params)),
+            })
+
+    def snapshot(self):
+        """One dict per query name: calls, errors, rows and p50/p95/max per phase (ms)."""
+        with self._lock:
+            rows = []
+            for name, entry in sorted(self._queries.items()):
+                row = {"query": name, "calls": entry["calls"], "errors": entry["errors"], "rows": entry["rows"]}
+                for phase in ("total",) + PHASES:
+                    hist = entry[phase]
+                    row[f"{phase}_p50_ms"] = hist.percentile(0.5)
+                    row[f"{phase}_p95_ms"] = hist.percentile(0.95)
+                    row[f"{phase}_max_ms"] = round(hist.max, 1)
+                rows.append(row)
+            return rows
+
+    def histogram(self, name, phase="total"):
+        """[(bucket label, count)] for one query, for charts."""
+        with self._lock:
+            hist = self._queries[name][phase]
+            labels = [f"≤{b}" for b in hist.buckets] + [f">{hist.buckets[-1]}"]
+            return list(zip(labels, hist.counts))
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self.slow_log.clear()
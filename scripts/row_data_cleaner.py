@@ -1,9 +1,17 @@
 import re
-import shutil
 import os
+import argparse
+import tempfile
+from functools import partial
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from excel_export import write_excel
+from tripsheet_parser import load_raw_sheet, parse_tripsheet
+from batch_runner import find_excel_files, run_batch, atomic_output
+from staging import staging_path, write_staging
+from stage_profiler import StageProfiler, timed_stage, cprofile_to
+from text_normalize import normalize_frame, replace_text
 
 #-------------------CONFIG--------------------
 sourse_folder = r"D:\my_projects\air-india-data\data-dec-2025\Vendor_TripSheet_Report"
@@ -13,167 +21,84 @@ PROCESSED_FOLDER = os.path.join(sourse_folder, "processed")
 
 
 # --- HELPER FUNCTION: SAVE FORMATTED EXCEL ---
+def column_widths(df):
+    """ADDRESS 80, DATE 18, TIME 12, everything else auto-fitted to its longest value (18-50)."""
+    widths = {}
+    for col_name in df.columns:
+        name = str(col_name)
+        if 'ADDRESS' in name:
+            widths[name] = 80
+        elif 'DATE' in name:
+            widths[name] = 18
+        elif 'TIME' in name:
+            widths[name] = 12
+        else:
+            max_data_len = df[col_name].astype(str).str.len().max()
+            max_len = max(0 if pd.isna(max_data_len) else max_data_len, len(name)) + 2
+            widths[name] = min(max(max_len, 18), 50) # Increased min width slightly for larger font
+    return widths
+
 def save_formatted_excel(df, output_path):
-    """Saves the dataframe with font size 13, row height 30, and auto-fitted columns."""
+    """
+    Saves the dataframe with font size 13, row height 30, and auto-fitted columns.
+    Rows are streamed to disk (constant_memory), so big files don't sit in RAM.
+    Written to a temp file and renamed into place; returns True on success.
+    """
     try:
-        writer = pd.ExcelWriter(output_path, engine='xlsxwriter')
-        df.to_excel(writer, sheet_name='Sheet1', index=False)
-        
-        workbook  = writer.book
-        worksheet = writer.sheets['Sheet1']
-        
-        # --- DEFINE FORMATS (Font Size 13 added here) ---
-        base_format = {
-            'font_size': 13,   # Set Font Size to 13
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
+        style = {
+            'font_size': 13, 'header_height': 30, 'row_height': 30, 'text_wrap': False,
+            'widths': column_widths(df), 'width_rules': [], 'default_width': 18,
+            # Address wraps, real dates/times get a number format
+            'format_rules': [('ADDRESS', 'wrap'), ('DATE', 'date')],
+            'date_num_format': 'yyyy-mm-dd', 'time_num_format': 'hh:mm:ss',
         }
-
-        # Header Format
-        header_format = workbook.add_format({
-            **base_format,     # Inherit font size 13
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'vcenter',
-            'fg_color': '#0070C0', 
-            'font_color': '#FFFFFF'
-        })
-        
-        # Data Formats
-        date_format = workbook.add_format(base_format)
-        time_format = workbook.add_format(base_format)
-        datetime_format = workbook.add_format({
-            **base_format,
-            'num_format': 'dd-mm-yyyy hh:mm:ss' 
-        })
-        text_format = workbook.add_format(base_format)
-        
-        # Address Format (Left align + Text Wrap)
-        address_format = workbook.add_format({
-            **base_format, 
-            'align': 'center', 
-            'valign': 'vcenter',
-            'text_wrap': True
-        })
-
-        # --- SET ROW HEIGHT ---
-        # Set Header Row Height
-        worksheet.set_row(0, 30) 
-        
-        # Set Data Row Heights (Loop through all rows with data)
-        for row_idx in range(1, len(df) + 1):
-            worksheet.set_row(row_idx, 30)
-
-        # --- APPLY COLUMN WIDTHS & FORMATS ---
-        for col_num, col_name in enumerate(df.columns):
-            # Write header
-            worksheet.write(0, col_num, col_name, header_format)
-            
-            # --- LOGIC TO DETERMINE WIDTH ---
-            if 'ADDRESS' in str(col_name):
-                column_width = 80
-                current_format = address_format
-            else:
-                # Calculate max length of data to fit column
-                max_data_len = df[col_name].astype(str).map(len).max()
-                max_len = max(max_data_len, len(str(col_name))) + 2 
-                column_width = min(max(max_len, 18), 50) # Increased min width slightly for larger font
-                
-                if 'DATE' in str(col_name):
-                    current_format = date_format
-                    column_width = 18 
-                elif 'TIME' in str(col_name):
-                    current_format = time_format
-                    column_width = 12
-                else:
-                    current_format = text_format
-
-            # Apply width and format
-            worksheet.set_column(col_num, col_num, column_width, current_format)
-
-        writer.close()
+        with atomic_output(output_path) as tmp_path:
+            write_excel(df, style, tmp_path, constant_memory=True)
         print(f"SUCCESS: Saved {os.path.basename(output_path)}")
+        return True
         
     except Exception as e:
         print(f"FAILED to save {os.path.basename(output_path)}: {e}")
+        return False
 # --- MAIN FUNCTION: CLEAN DATA ---
-def clean_data(file_path, destination_folder):
+def clean_data(file_path, destination_folder, profiler=None):
+    """
+    Cleans one raw TripSheet into destination_folder. Returns (output_path, rows) or None.
+    profiler (StageProfiler, optional) gets one timing per pipeline stage.
+    """
     print(f"Processing: {os.path.basename(file_path)}")
     
     # 1. Load Data
     try:
-        df = pd.read_excel(file_path, header=None) 
+        with timed_stage(profiler, "read_excel"):
+            raw_df = load_raw_sheet(file_path)
     except Exception as e:
         print(f"Error reading file: {e}")
-        return
+        return None
 
-    df.drop(index=1, inplace=True)
-    df.dropna(how="all", inplace=True)
-    df.reset_index(drop=True, inplace=True)
+    # 2. Split header/passenger rows, merge, Trip ID / Direction / Shift Time (shared parser)
+    final_df = parse_tripsheet(raw_df, 'UNITED FACILITIES', profiler)
 
-    # 2. Extract Trip ID
-    df["Trip_ID"] = df[10].astype(str).apply(lambda x: x if x.startswith("T") else "")
-    df["Trip_ID"] = df["Trip_ID"].replace("", pd.NA).ffill()
+    # --- DATA CLEANING ---
+    with timed_stage(profiler, "clean"):
+        final_df.loc[final_df['Pax_no'] == 2, 'Marshall'] = np.nan
+        final_df['Marshall'] = replace_text(final_df['Marshall'], {'MARSHALL': 'Guard'})
 
-    # 3. Split Header vs Passenger Rows
-    df[1] = df[1].astype(str)
-    
-    # Header rows (UNITED FACILITIES)
-    df_headers = df[df[1].str.contains("UNITED FACILITIES", na=False)].copy()
-    
-    # Passenger rows (Start with 1-4)
-    df_passengers = df[df[0].astype(str).str.match(r"^[12345]$")].copy()
-
-    df_headers.reset_index(drop=True, inplace=True)
-    df_passengers.reset_index(drop=True, inplace=True)
-
-    # 4. Rename Columns
-    header_mapping = {
-        0: 'Trip_Date', 1: 'Agency_Name', 2: 'Driver_Login_Time', 3: 'Vehicle_No',
-        4: 'Driver_Name', 5: 'Trip_Zone', 6: 'Driver_Mobile', 7: 'Marshall',
-        8: 'Distance', 9: 'Emp_Count', 10: 'Trip_Count', 11: 'Trip_Sheet_ID_Raw'
-    }
-    df_headers_renamed = df_headers.rename(columns=header_mapping)
-
-    passenger_mapping = {
-        0: 'Pax_no', 1: 'Reporting_Time', 2: 'Employee_ID', 3: 'Employee_Name',
-        4: 'Gender', 5: 'Emp_Category', 6: 'Flight_No.', 7: 'Address',
-        8: 'Reporting_Location', 9: 'Landmark', 10: 'Passenger_Mobile', 11: 'Pax_Col_11_Empty'
-    }
-    df_passengers_renamed = df_passengers.rename(columns=passenger_mapping)
-
-    # 5. Merge DataFrames
-    final_df = pd.merge(df_passengers_renamed, df_headers_renamed, on='Trip_ID', how='left')
 
-    # --- DATA CLEANING ---
-    final_df['Trip_ID'] = final_df['Trip_ID'].astype(str).str.replace('T', '', regex=False)
-    final_df['Vehicle_No'] = final_df['Vehicle_No'].astype(str).str.replace('-', '', regex=False)
-
-    # Split Login Time
-    split_data = final_df['Driver_Login_Time'].astype(str).str.strip().str.split(' ', n=1, expand=True)
-    final_df['Direction'] = split_data[0]
-    final_df['Shift_Time'] = pd.to_datetime(split_data[1], format='%H:%M', errors='coerce').dt.time
-    final_df['Direction'] = final_df['Direction'].astype(str).str.replace('Login', 'Pickup', regex=False)
-    final_df['Direction'] = final_df['Direction'].astype(str).str.replace('Logout', 'Drop', regex=False)
-    final_df.loc[final_df['Pax_no'] == 2, 'Marshall'] = np.nan
-    final_df['Marshall'] = final_df['Marshall'].astype(str).str.replace('MARSHALL', 'Guard', regex=False)
-
-
-    # Handle Dates
-    final_df['Trip_Date'] = pd.to_datetime(final_df['Trip_Date'], errors='coerce')
-    final_df['Date'] = final_df['Trip_Date'].dt.date
-    
-    # Numeric Conversion
-    cols_to_numeric = ['Trip_ID', 'Emp_Count', 'Employee_ID', 'Pax_no']
-    final_df[cols_to_numeric] = final_df[cols_to_numeric].apply(pd.to_numeric, errors='coerce')
+        # Handle Dates
+        final_df['Trip_Date'] = pd.to_datetime(final_df['Trip_Date'], errors='coerce')
+        final_df['Date'] = final_df['Trip_Date'].dt.date
+        
+        # Numeric Conversion
+        cols_to_numeric = ['Trip_ID', 'Emp_Count', 'Employee_ID', 'Pax_no']
+        final_df[cols_to_numeric] = final_df[cols_to_numeric].apply(pd.to_numeric, errors='coerce')
 
-    final_df['Trip_Date'] = final_df['Trip_Date'].astype(str)
+        final_df['Trip_Date'] = final_df['Trip_Date'].astype(str)
 
     # --- UPPERCASE & CLEANUP ---
-    final_df.columns = final_df.columns.astype(str).str.strip().str.upper()
-    str_cols = final_df.select_dtypes(include=['object']).columns
-    final_df[str_cols] = final_df[str_cols].apply(lambda x: x.astype(str).str.strip().str.upper())
+    with timed_stage(profiler, "upper_strip"):
+        final_df.columns = final_df.columns.astype(str).str.strip().str.upper()
+        final_df = normalize_frame(final_df)
 
     # --- FINAL SELECTION ---
     desired_order = [
@@ -209,22 +134,65 @@ def clean_data(file_path, destination_folder):
     output_filename = f"{date_str} {direction_str}.xlsx"
     output_path = os.path.join(destination_folder, output_filename)
 
-    # 4. Save
-    save_formatted_excel(final_df, output_path)
-    shutil.move(file_path, os.path.join(PROCESSED_FOLDER, os.path.basename(file_path))) 
+    # 4. Save (the batch runner moves the raw file to 'processed' only if this worked)
+    with timed_stage(profiler, "write_excel"):
+        saved = save_formatted_excel(final_df, output_path)
+    if not saved:
+        return None
+
+    # 5. Typed staging twin for data_loader.py (skips the Excel round trip)
+    try:
+        with timed_stage(profiler, "write_staging"):
+            write_staging(final_df, staging_path(output_path))
+    except Exception as e:
+        print(f"FAILED to stage {os.path.basename(output_path)}: {e}")
+        return None
     print(f"Processed: {os.path.basename(file_path)}")
+    return output_path, len(final_df)
+
+
+def clean_data_with_stages(file_path, destination_folder, track_memory=False):
+    """clean_data() that prints its stage table afterwards (--stages)."""
+    profiler = StageProfiler(track_memory)
+    result = clean_data(file_path, destination_folder, profiler)
+    print(f"⏱️ Stages for {os.path.basename(file_path)}:\n{profiler.format_table()}")
+    return result
+
+
+def profile_one(file_path, stats_path=None):
+    """
+    --profile: cleans one file under cProfile into a temp folder (nothing is moved
+    or left behind) and writes the stats next to the input as <name>.prof.
+    """
+    stats_path = stats_path or os.path.splitext(file_path)[0] + ".prof"
+    with tempfile.TemporaryDirectory() as out_dir:
+        with cprofile_to(stats_path):
+            result = clean_data_with_stages(file_path, out_dir, track_memory=False)
+    return result
+
+
 # --- EXECUTION LOOP ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean raw vendor TripSheets in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: all cores, 1 = no pool)")
+    parser.add_argument("--stages", action="store_true", help="Print per-stage time and peak memory for every file")
+    parser.add_argument("--profile", metavar="FILE", help="Only profile FILE with cProfile (writes FILE's name + .prof)")
+    parser.add_argument("--profile-out", metavar="PATH", help="Where --profile writes its stats")
+    args = parser.parse_args()
+
+    if args.profile:
+        profile_one(args.profile, args.profile_out)
+        raise SystemExit
+
     print(f"Scanning folder: {sourse_folder}")
-    files_found = 0
-    for root, dirs, files in os.walk(sourse_folder):
-        for file in files:
-            if file.endswith(('.xls', '.xlsx')) and "final" not in root:
-                files_found += 1
-                file_path = os.path.join(root, file)
-                clean_data(file_path, destination_folder)
+    files = find_excel_files(sourse_folder)
     
-    if files_found == 0:
+    if not files:
         print("No Excel files found to process.")
     else:
+        if args.stages:
+            clean = partial(clean_data_with_stages, destination_folder=destination_folder, track_memory=True)
+        else:
+            clean = partial(clean_data, destination_folder=destination_folder)
+        run_batch(clean, files, PROCESSED_FOLDER, args.workers)
         print("Processing complete.")
\ No newline at end of file
@@ -0,0 +1,102 @@
+import time
+import cProfile
+import pstats
+import tracemalloc
+import pyarrow as pa
+from contextlib import contextmanager, nullcontext
+
+# Named stage timings for the TripSheet cleaners:
+#
+#   profiler = StageProfiler(track_memory=True)
+#   with profiler.stage("read_excel"): ...
+#   print(profiler.format_table())
+#
+# Memory is reported per stage on top of what was already in use when it started:
+# - peak_mb: tracemalloc peak (Python objects and numpy/pandas buffers).
+# - arrow_mb: pyarrow's memory pool, which tracemalloc does not see. The Arrow-backed
+#   text / category / time columns (text_normalize.py, TRIP_SCHEMA) live there.
+#   The pool only keeps a process-wide high-water mark, so this is the stage's peak
+#   when it set a new one, else what the stage still held at its end (a lower bound).
+# tracemalloc slows Python code down, so memory tracking is opt-in.
+# Stages must not nest (each one resets the tracemalloc peak).
+
+
+class StageProfiler:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        started_tracing = self.track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            pool = pa.default_memory_pool()
+            arrow_base, arrow_max = pool.bytes_allocated(), pool.max_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"stage": name, "secs": time.perf_counter() - start}
+            if self.track_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                entry["peak_mb"] = (peak - base) / 2**20
+                arrow_peak = pool.max_memory() if pool.max_memory() > arrow_max else pool.bytes_allocated()
+                entry["arrow_mb"] = max(arrow_peak - arrow_base, 0) / 2**20
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(entry)
+
+    def total_secs(self):
+        return sum(entry["secs"] for entry in self.stages)
+
+    def report(self):
+        """[{stage, secs, share, peak_mb?, arrow_mb?}] in the order the stages ran (repeated names are summed)."""
+        merged = {}
+        for entry in self.stages:
+            row = merged.setdefault(entry["stage"], {"stage": entry["stage"], "secs": 0.0})
+            row["secs"] += entry["secs"]
+            for key in ("peak_mb", "arrow_mb"):
+                if key in entry:
+                    row[key] = max(row.get(key, 0.0), entry[key])
+        total = self.total_secs() or 1.0
+        for row in merged.values():
+            row["share"] = row["secs"] / total
+        return list(merged.values())
+
+    def format_table(self):
+        """Text table for CLI output."""
+        lines = [f"   {'stage':<16} {'secs':>8} {'share':>6}" + (f" {'peak MB':>8} {'arrow MB':>8}" if self.track_memory else "")]
+        for row in self.report():
+            line = f"   {row['stage']:<16} {row['secs']:>8.3f} {row['share']:>6.0%}"
+            if "peak_mb" in row:
+                line += f" {row['peak_mb']:>8.1f} {row['arrow_mb']:>8.1f}"
+            lines.append(line)
+        lines.append(f"   {'total':<16} {self.total_secs():>8.3f}")
+        return "\n".join(lines)
+
+
+def timed_stage(profiler, name):
+    """profiler.stage(name), or a no-op when no profiler was passed."""
+    return profiler.stage(name) if profiler else nullcontext()
+
+
+@contextmanager
+def cprofile_to(path, top=15):
+    """
+    Runs the block under cProfile and dumps the stats to path (pstats format:
+    open with snakeviz, or turn into a flamegraph with flameprof / gprof2dot).
+    Prints the top functions by cumulative time.
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        print(f"📈 cProfile stats written to {path}")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(top)
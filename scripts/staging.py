@@ -0,0 +1,80 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from excel_reader import NA_TOKENS
+from batch_runner import atomic_output
+
+# ---------------------------------------------------------
+# Typed Parquet staging files.
+# Cleaners write one next to each cleaned .xlsx report (same name, .parquet);
+# data_loader.py loads the .parquet instead of parsing the report back out of
+# Excel, so no cell is re-encoded as text or re-inferred on the way to the DB.
+# ---------------------------------------------------------
+
+STAGING_EXT = ".parquet"
+
+# Cleaned column (as in the .xlsx reports / data_loader.COLUMN_MAP) -> Arrow type
+STAGING_SCHEMA = pa.schema([
+    ("DATE", pa.date32()),
+    ("TRIP_ID", pa.int64()),
+    ("FLIGHT_NO.", pa.string()),
+    ("EMPLOYEE_ID", pa.int64()),
+    ("EMPLOYEE_NAME", pa.string()),
+    ("GENDER", pa.string()),
+    ("ADDRESS", pa.string()),
+    ("LANDMARK", pa.string()),
+    ("VEHICLE_NO", pa.string()),
+    ("DIRECTION", pa.string()),
+    ("SHIFT_TIME", pa.string()),
+    ("TRIP_DATE", pa.string()),
+    ("EMP_COUNT", pa.int64()),
+    ("PAX_NO", pa.int64()),
+    ("MARSHALL", pa.string()),
+    ("REPORTING_LOCATION", pa.string()),
+    ("TRIP_ZONE", pa.string()),
+])
+
+
+def staging_path(report_path):
+    """'.../25-11-2025 Pickup.xlsx' -> '.../25-11-2025 Pickup.parquet'"""
+    return os.path.splitext(report_path)[0] + STAGING_EXT
+
+
+def to_staging_frame(df):
+    """
+    Cleaned frame -> STAGING_SCHEMA columns and types (absent columns are all-null).
+    Text cells that the Excel round trip turned into blanks ('', 'NA', ...) become null here too.
+    """
+    out = {}
+    for field in STAGING_SCHEMA:
+        if field.name in df.columns:
+            values = df[field.name]
+        else:
+            values = pd.Series(None, index=df.index, dtype=object)
+
+        if pa.types.is_integer(field.type):
+            out[field.name] = pd.to_numeric(values, errors='coerce').astype('Int64')
+        elif pa.types.is_date(field.type):
+            out[field.name] = pd.to_datetime(values, errors='coerce').dt.date
+        else:
+            # object first: Arrow time / categorical columns can't take the str() values back
+            values = values.astype(object)
+            text = values.where(values.isna(), values.astype(str))
+            out[field.name] = text.where(~text.isin(NA_TOKENS))
+    return pd.DataFrame(out, index=df.index)
+
+
+def write_staging(df, path):
+    """Writes the typed staging file (temp file + rename, like the .xlsx reports)."""
+    table = pa.Table.from_pandas(to_staging_frame(df), schema=STAGING_SCHEMA, preserve_index=False)
+    with atomic_output(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def read_staging(path):
+    """Staging file -> frame with nullable ints / strings, ready for data_loader.prepare_frame."""
+    return pq.read_table(path, schema=STAGING_SCHEMA).to_pandas(types_mapper={
+        pa.int64(): pd.Int64Dtype(),
+        pa.string(): pd.StringDtype(),
+    }.get)
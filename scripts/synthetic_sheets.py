@@ -0,0 +1,84 @@
+from datetime import datetime, time as dtime
+
+import numpy as np
+import pandas as pd
+
+# Synthetic raw sheets in the layouts the cleaners read, for benchmarks and
+# golden-output checks (no client data needed):
+# - raw_tripsheet(): vendor TripSheet (row_data_cleaner.py, row_data_cleaner_app.py,
+#   other.py). Title + sub-title row, then per trip one header row (date, agency,
+#   "Login 08:30", vehicle ... 'T1234567') followed by its numbered passenger rows.
+# - manual_sheet(): manual roster (manual_data_clener.py).
+
+VENDORS = ["UNITED FACILITIES", "J TRAVELS", "BAJAJ"]
+DIRECTIONS = ["Login", "Logout"]
+TRIP_DATE = datetime(2025, 11, 25)
+
+
+def raw_tripsheet(trips=100, pax=(1, 5), vendors=("UNITED FACILITIES",), direction="Login",
+                  trip_date=TRIP_DATE, seed=0):
+    """
+    Raw TripSheet with `trips` trips of pax[0]..pax[1] passengers each.
+    Trips cycle through `vendors`; direction=None alternates Login/Logout.
+    United Facilities sheets only number passengers 1-5 (the cleaner matches [1-5]).
+    """
+    rng = np.random.default_rng(seed)
+    rows = [["TRIP SHEET REPORT"] + [np.nan] * 11, ["Vendor TripSheet Report"] + [np.nan] * 11]
+    for t in range(trips):
+        vendor = vendors[t % len(vendors)]
+        count = int(rng.integers(pax[0], pax[1] + 1))
+        login = direction or DIRECTIONS[t % 2]
+        # Column 10 holds the 'T...' trip ID (see tripsheet_parser.HEADER_MAPPING)
+        rows.append([
+            trip_date, vendor, f"{login} {int(rng.integers(0, 24)):02d}:{30 * int(rng.integers(0, 2)):02d}",
+            f"HR-55-AB-{t % 10000:04d}", f"DRIVER {t}", f"ZONE {t % 5}", 9800000000 + t,
+            "MARSHALL" if t % 3 == 0 else np.nan, round(float(rng.uniform(5, 40)), 1), count,
+            f"T{1000000 + t:07d}", f"TS{t + 1}",
+        ])
+        for p in range(1, count + 1):
+            rows.append([
+                p, "08:00", 10000 + t * 10 + p, f" employee {t}-{p} ", "Female" if p % 2 else "Male", "STAFF",
+                f"AI{100 + t % 900}" if p == 1 else np.nan, f"house {p}, sector {t % 80}, gurgaon",
+                f"T{t % 3 + 1}", "near mall", 9900000000 + p, np.nan,
+            ])
+        rows.append([np.nan] * 12)
+    return pd.DataFrame(rows)
+
+
+def trips_for_rows(rows, pax=(1, 5)):
+    """Trips needed for about `rows` passenger rows."""
+    return max(1, round(rows / ((pax[0] + pax[1]) / 2)))
+
+
+def manual_sheet(n_rows, seed=0):
+    """Raw manual sheet: per-route location row + header row, then passengers (blanks, 'NA', stray spaces)."""
+    rng = np.random.default_rng(seed)
+    rows = [["AIR INDIA MANUAL ROSTER"] + [None] * 11]
+    route = 0
+    while len(rows) < n_rows:
+        route += 1
+        rows.append([None, None, None, None, f'EMPLOYEE ADDRESS "T{route % 3 + 1} TERMINAL"'] + [None] * 7)
+        rows.append(["ROUTE", "TRG", "EMP ID", "NAME", "ADDRESS", "MOBILE", "CAB", "PICKUP", "SHIFT", "REMARKS", "GENDER", "SHEET"])
+        for pax in range(int(rng.integers(1, 5))):
+            rows.append([
+                route if pax == 0 else None,
+                rng.choice(["TRAINING", "OJT", " ", "NA"]),
+                int(rng.integers(100000, 999999)) if rng.random() > 0.05 else str(rng.integers(100000, 999999)),
+                f" employee {len(rows)} ",
+                f"HOUSE {len(rows)}, SECTOR {len(rows) % 80}, GURGAON",
+                str(rng.integers(7000000000, 9999999999)),
+                int(rng.integers(1000, 9999)) if rng.random() > 0.1 else None,
+                dtime(int(rng.integers(0, 24)), 15),
+                dtime(int(rng.integers(0, 24)), 30) if rng.random() > 0.2 else "08:30",
+                rng.choice(["", "LATE", "N/A", "  "]),
+                rng.choice(["MALE", "FEMALE"]),
+                None,
+            ])
+        rows.append([None] * 12)
+    return pd.DataFrame(rows)
+
+
+def write_sheet(df, path):
+    """Saves a raw sheet the way vendors send it (no header row, no index)."""
+    df.to_excel(path, header=False, index=False, engine="xlsxwriter")
+    return path
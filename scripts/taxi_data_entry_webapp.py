@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import toml
 import time
-import string
-from datetime import datetime
+from datetime import datetime, date
+from db_pool import ConnectionPool
+from query_stats import QueryStats
+from voucher_allocator import PREVIEW_SQL, format_voucher
+from travel_records import save_trip_group
+from trip_lookup import parse_trip_id, dump_lookup_query, prefetch_query, records_query, records_page_query, RECORDS_PAGE_SIZE
+from trip_cache import TripLookupCache, LEDGER_VERSION_SQL
+from travel_rollups import dashboard_queries
 
 # 1. PAGE CONFIG
 st.set_page_config(page_title="Taxi Travel Management System", layout="wide", initial_sidebar_state="collapsed")
@@ -18,85 +22,190 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-def get_db_connection():
+@st.cache_resource
+def get_db_pool():
+    # One pool per server process, shared by every session and rerun
+    # st.secrets works on Cloud (reads dashboard settings) AND Local (reads the file automatically)
+    db = st.secrets["postgres"]
+    return ConnectionPool(
+        host=db["host"],
+        database=db["dbname"],
+        user=db["user"],
+        password=db["password"],
+        port=db["port"]
+    )
+
+def get_pool():
     try:
-        # st.secrets works on Cloud (reads dashboard settings) AND Local (reads the file automatically)
-        db = st.secrets["postgres"] 
-        
-        return psycopg2.connect(
-            host=db["host"],
-            database=db["dbname"],
-            user=db["user"],
-            password=db["password"],
-            port=db["port"]
-        )
+        return get_db_pool()
     except Exception as e:
         st.error(f"❌ Connection Failed: {e}")
         return None
 
-def run_query(query, params=None, fetch=False):
-    conn = get_db_connection()
-    if conn is None: return None
+@st.cache_resource
+def get_query_stats():
+    # Timings of every named query, shared by every session (see query_stats.py)
+    return QueryStats()
+
+def run_query(query, params=None, fetch=False, name="other"):
+    """DataFrame (fetch) / True, or None on any error (logged and counted under name)."""
+    pool = get_pool()
+    if pool is None: return None
     try:
-        cur = conn.cursor()
-        cur.execute(query, params)
-        if fetch:
-            columns = [desc[0] for desc in cur.description]
-            data = cur.fetchall()
-            conn.close()
-            return pd.DataFrame(data, columns=columns)
-        else:
-            conn.commit()
-            conn.close()
-            return True
-    except: 
-        if conn: conn.close()
+        with get_query_stats().measure(name, params) as q:
+            with q.phase("connect"):
+                conn = pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    with q.phase("execute"):
+                        cur.execute(query, params)
+                    if fetch:
+                        with q.phase("fetch"):
+                            columns = [desc[0] for desc in cur.description]
+                            df = pd.DataFrame(cur.fetchall(), columns=columns)
+                        q.rows = len(df)
+                        return df
+                    q.rows = max(cur.rowcount, 0)
+                conn.commit()
+                return True
+            finally:
+                pool.putconn(conn)  # Rolls back anything left open
+    except Exception:
         return None
 
+def is_admin():
+    """The query stats page is hidden: open the app with ?admin=<admin_key from secrets>."""
+    key = st.query_params.get("admin")
+    try:
+        expected = st.secrets.get("admin_key")
+    except Exception:
+        expected = None
+    return bool(key) and expected is not None and key == str(expected)
+
+# Records pages are cached briefly per filter + cursor; a save clears them at once
+RECORDS_TTL = 60
+
+@st.cache_data(ttl=RECORDS_TTL, show_spinner=False)
+def load_records_page(before_s_no, date_from, date_to, voucher):
+    """(page DataFrame, s_no to continue below or None on the last page)"""
+    sql, params = records_page_query(before_s_no, date_from, date_to, voucher)
+    df = run_query(sql, params, fetch=True, name="records page")
+    if df is None:
+        raise RuntimeError("Could not load records")
+    if len(df) > RECORDS_PAGE_SIZE:
+        df = df.iloc[:RECORDS_PAGE_SIZE]
+        return df, int(df["s_no"].iloc[-1])
+    return df, None
+
+# Dashboard reads only the rollup tables (travel_rollups.py); a save clears it at once
+DASHBOARD_TTL = 300
+
+@st.cache_data(ttl=DASHBOARD_TTL, show_spinner=False)
+def load_dashboard(date_from, date_to):
+    """{name: DataFrame} for the Dashboard tab, amounts as floats."""
+    frames = {}
+    for name, (sql, params) in dashboard_queries(date_from, date_to).items():
+        df = run_query(sql, params, fetch=True, name=f"dashboard {name}")
+        if df is None:
+            raise RuntimeError("Could not load the dashboard")
+        for col in ("trips", "passengers", "amount", "cost"):
+            if col in df.columns: df[col] = pd.to_numeric(df[col])
+        frames[name] = df
+    return frames
+
+@st.cache_resource
+def get_lookup_cache():
+    # Entry tab searches, shared by every session (see trip_cache.py)
+    return TripLookupCache()
+
+def ledger_version():
+    df = run_query(LEDGER_VERSION_SQL, fetch=True, name="ledger version")
+    return tuple(df.iloc[0]) if df is not None and not df.empty else None
+
+def find_trip(s_type, trip_id, search_date=None):
+    """Dump rows for a trip as dicts (served from the lookup cache when possible), or None on a DB error."""
+    cache = get_lookup_cache()
+    cache.sync(ledger_version)
+    key = (s_type, trip_id, search_date if s_type == "Manual" else None)
+    records = cache.get(key)
+    if records is None:
+        sql, params = dump_lookup_query(s_type, trip_id, search_date)
+        df = run_query(sql, params, fetch=True, name="trip lookup")
+        if df is None: return None
+        records = df.to_dict('records')
+        cache.put(key, records)
+    return records
+
+def prefetch_trips(s_type, trip_date):
+    """Loads every trip of trip_date into the lookup cache. Returns the number of trips, or None."""
+    cache = get_lookup_cache()
+    cache.sync(ledger_version)
+    sql, params = prefetch_query(s_type, trip_date)
+    df = run_query(sql, params, fetch=True, name="trip prefetch")
+    if df is None: return None
+    return cache.prefetch(s_type, df.to_dict('records'), trip_date)
+
 def get_next_voucher_number():
     """
-    Finds the highest existing sequence number for TODAY
-    and returns the next one.
+    Preview of the next voucher number for TODAY (display only).
     Format: YYYYMMDD-SEQ (e.g., 20251213-01, 20251213-02)
+    The real number is reserved with allocate_voucher() at save time.
     """
-    today = datetime.now().strftime("%Y%m%d") # Format: YYYYMMDD
-    
-    # Prefix is just the date plus a hyphen
-    search_prefix = f"{today}-"
-    search_pattern = f"{search_prefix}%"
-    
-    # Logic: Look for vouchers starting with today's date.
-    # We take the substring AFTER the hyphen and convert to INT to find the max.
-    sql = """
-    SELECT SUBSTRING(voucher_no FROM LENGTH(%s) + 1)::INT
-    FROM taxi_travels
-    WHERE voucher_no LIKE %s
-    ORDER BY 1 DESC
-    LIMIT 1
-    """
-    params = (search_prefix, search_pattern)
-    df = run_query(sql, params, fetch=True)
-    
-    if df is not None and not df.empty and pd.notnull(df.iloc[0, 0]):
-        # Found existing, increment the highest sequence number
-        last_seq = df.iloc[0, 0]
-        next_seq = last_seq + 1
-    else:
-        # First voucher of the day
-        next_seq = 1
-        
-    # Format: YYYYMMDD-01 (Using 2 digits for sequence)
-    return f"{search_prefix}{next_seq:02d}"
+    today = date.today()
+    # Single primary-key read of the day's counter (no scan of taxi_travels)
+    df = run_query(PREVIEW_SQL, (today,), fetch=True, name="voucher preview")
+    last_seq = int(df.iloc[0, 0]) if df is not None and not df.empty else 0
+    return format_voucher(today, last_seq + 1)
 
 # --- STATE ---
 if "found_employees" not in st.session_state: st.session_state["found_employees"] = []
 if "search_done" not in st.session_state: st.session_state["search_done"] = False
 if "view_data" not in st.session_state: st.session_state["view_data"] = None
+# Browse cursors: s_no each visited page starts below (None = newest page)
+if "records_cursors" not in st.session_state: st.session_state["records_cursors"] = [None]
+if "records_filters" not in st.session_state: st.session_state["records_filters"] = None
 
 # --- UI HEADER ---
 st.markdown("#### 🚖 Taxi Travel Management System")
 
-tab_entry, tab_view = st.tabs(["📝 Entry", "📊 Records"])
+# --- HIDDEN ADMIN PAGE (?admin=...) ---
+if is_admin():
+    stats = get_query_stats()
+    snapshot = stats.snapshot()
+    st.markdown("##### 🛠️ Query stats")
+    st.caption(f"Since server start · slow query threshold {stats.slow_ms:.0f} ms (SLOW_QUERY_MS)")
+    if snapshot:
+        st.dataframe(pd.DataFrame(snapshot), hide_index=True, use_container_width=True)
+        pick = st.selectbox("Latency histogram", [row["query"] for row in snapshot], key="admin_query")
+        st.dataframe(pd.DataFrame([dict(stats.histogram(pick))], index=["calls"]), use_container_width=True)
+    else:
+        st.info("No queries yet.")
+
+    st.markdown("##### 🐢 Slow queries")
+    st.dataframe(pd.DataFrame(list(stats.slow_log)), hide_index=True, use_container_width=True)
+
+    pool = get_pool()
+    if pool is not None: st.json(pool.snapshot())
+    if st.button("Reset stats", key="admin_reset"):
+        stats.reset()
+        st.rerun()
+    st.stop()
+
+with st.sidebar.expander("⚙️ DB Pool"):
+    pool = get_pool()
+    if pool is not None: st.json(pool.snapshot())
+
+with st.sidebar.expander("⚡ Trip cache"):
+    if st.button("Prefetch today's trips", key="prefetch_today"):
+        today = date.today()
+        counts = [prefetch_trips(t, today) for t in ("Application", "Manual")]
+        if None in counts:
+            st.error("Prefetch failed.")
+        else:
+            st.success(f"Cached {sum(counts)} trips for {today}.")
+    st.json(get_lookup_cache().snapshot())
+
+tab_entry, tab_view, tab_dash = st.tabs(["📝 Entry", "📊 Records", "📈 Dashboard"])
 
 # ================= TAB 1: ENTRY =================
 # ================= TAB 1: ENTRY =================
@@ -131,20 +240,14 @@ with tab_entry:
             if s_type == "Manual" and not search_trip_id:
                 st.error("Trip ID is required."); valid = False
             
+            trip_id_num = parse_trip_id(search_trip_id)
+            if valid and search_trip_id and trip_id_num is None:
+                st.error("Trip ID must be a number."); valid = False
+            
             if valid and search_trip_id:
-                if s_type == "Application":
-                    tbl = "application_data_dump"
-                    sql = f"SELECT employee_id, employee_name, gender, address, direction, trip_date, shift_time FROM {tbl} WHERE CAST(trip_id AS TEXT) = %s"
-                    params = (search_trip_id,)
-                else:
-                    tbl = "manual_data_dump"
-                    sql = f"SELECT employee_id, employee_name, gender, address, direction, trip_date, shift_time FROM {tbl} WHERE CAST(trip_id AS TEXT) = %s AND trip_date = %s"
-                    params = (search_trip_id, search_date)
-                
-                df = run_query(sql, params, fetch=True)
-                if df is not None and not df.empty:
-                    df.insert(0, "Select", False) 
-                    st.session_state["found_employees"] = df.to_dict('records')
+                records = find_trip(s_type, trip_id_num, search_date)
+                if records:
+                    st.session_state["found_employees"] = [{"Select": False, **r} for r in records]
                     st.session_state["search_done"] = True
                 else:
                     st.warning("No data found.")
@@ -209,38 +312,38 @@ with tab_entry:
             if errs: 
                 for e in errs: st.error(e)
             else:
-                conn = get_db_connection()
-                cur = conn.cursor()
+                pool = get_pool()
+                conn = None
                 try:
-                    # RE-CALCULATE strictly at save time to prevent race conditions
-                    full_base_vouch_no = get_next_voucher_number()
-                    
-                    suffixes = list(string.ascii_uppercase)
-                    
-                    for i, row in enumerate(selected_rows.itertuples()):
-                        amt = f_amt if i == 0 else 0.0
-                        
-                        if i == 0:
-                            final_vouch_no = full_base_vouch_no
-                        else:
-                            suffix_letter = suffixes[i - 1] 
-                            final_vouch_no = f"{full_base_vouch_no}{suffix_letter}"
-
-                        sql = """INSERT INTO taxi_travels (travel_date, travel_type, direction, shift_time, trip_id, sap_id, emp_name, address, reason, amount, voucher_no)
-                                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-                        cur.execute(sql, (f_date, s_type, f_dir, f_shift, int(f_trip) if f_trip.isdigit() else 0, 
-                                          int(row.employee_id), row.employee_name, row.address, f_reason.upper(), amt, final_vouch_no))
-                    
-                    conn.commit()
-                    conn.close()
+                    if pool is None: raise RuntimeError("Database unavailable")
+                    trip = {
+                        "travel_date": f_date, "travel_type": s_type, "direction": f_dir, "shift_time": f_shift,
+                        "trip_id": int(f_trip) if f_trip.isdigit() else 0, "reason": f_reason.upper(), "amount": f_amt,
+                    }
+                    employees = selected_rows[["employee_id", "employee_name", "address"]].itertuples(index=False, name=None)
+
+                    with get_query_stats().measure("insert trip group") as q:
+                        with q.phase("connect"):
+                            conn = pool.getconn()
+                        cur = conn.cursor()
+                        # Voucher + every employee in one transaction and one INSERT (no races, no gaps)
+                        with q.phase("execute"):
+                            full_base_vouch_no, s_nos = save_trip_group(cur, trip, employees)
+                            conn.commit()
+                        q.rows = len(s_nos)
+
+                    pool.putconn(conn)
+                    conn = None
+                    load_records_page.clear()
+                    load_dashboard.clear()
                     
-                    st.success(f"✅ Saved! Voucher: {full_base_vouch_no}")
+                    st.success(f"✅ Saved {len(s_nos)} record(s)! Voucher: {full_base_vouch_no} (Ref No {s_nos[0]})")
                     st.session_state["found_employees"] = []
                     st.session_state["search_done"] = False
                     time.sleep(1)
                     st.rerun()
                 except Exception as e:
-                    if conn: conn.close()
+                    if conn: pool.putconn(conn)
                     st.error(f"Error: {e}")
 
 # ================= TAB 2: VIEW RECORDS =================
@@ -251,7 +354,7 @@ with tab_view:
     with v_container:
         vc1, vc2 = st.columns([1, 4])
         with vc1:
-            v_type = st.selectbox("Search By", ["All Recent", "Manual Search"], label_visibility="collapsed", key="v_type_sel")
+            v_type = st.selectbox("Search By", ["Browse", "Manual Search"], label_visibility="collapsed", key="v_type_sel")
 
         if v_type == "Manual Search":
             vc2a, vc2b, vc2c = vc2.columns([1.5, 1.5, 1])
@@ -259,28 +362,52 @@ with tab_view:
             v_trip = vc2b.text_input("Trip ID", placeholder="Trip ID", label_visibility="collapsed", key="v_trip")
             v_btn = vc2c.button("🔍 Search", use_container_width=True, key="v_btn")
         else:
-            vc2.info("Showing last 50 records. Switch to 'Manual Search' to find specific trips.")
+            vc2a, vc2b = vc2.columns([2, 2])
+            v_range = vc2a.date_input("Date range", value=(), label_visibility="collapsed", key="v_range")
+            v_voucher = vc2b.text_input("Voucher", placeholder="Voucher (e.g. 20251213-01)", label_visibility="collapsed", key="v_voucher")
             v_btn = False
 
     # --- 2. DATA FETCHING LOGIC ---
-    if v_btn or (v_type == "All Recent" and st.session_state["view_data"] is None):
-        if v_type == "Manual Search":
-            if v_trip:
-                sql = "SELECT * FROM taxi_travels WHERE CAST(trip_id AS TEXT) = %s"
-                params = [v_trip]
-                if v_date:
-                    sql += " AND travel_date = %s"
-                    params.append(v_date)
-                sql += " ORDER BY s_no ASC"
-                st.session_state["view_data"] = run_query(sql, tuple(params), fetch=True)
+    if v_type == "Manual Search":
+        if v_btn:
+            if v_trip and parse_trip_id(v_trip) is None:
+                st.warning("Trip ID must be a number.")
+            elif v_trip:
+                sql, params = records_query(parse_trip_id(v_trip), v_date)
+                st.session_state["view_data"] = run_query(sql, params, fetch=True, name="records by trip")
             else:
                 st.warning("Please enter a Trip ID to search.")
-        else:
-            st.session_state["view_data"] = run_query("SELECT * FROM taxi_travels ORDER BY s_no DESC LIMIT 50", fetch=True)
+    else:
+        # A single picked day means "that day"; new filters start again at the newest page
+        date_from = v_range[0] if len(v_range) > 0 else None
+        date_to = v_range[1] if len(v_range) > 1 else date_from
+        filters = (date_from, date_to, v_voucher.strip().upper())
+        if st.session_state["records_filters"] != filters:
+            st.session_state["records_filters"] = filters
+            st.session_state["records_cursors"] = [None]
+
+        cursors = st.session_state["records_cursors"]
+        try:
+            page_df, next_cursor = load_records_page(cursors[-1], *filters)
+        except Exception as e:
+            st.error(f"❌ {e}")
+            page_df, next_cursor = None, None
+        st.session_state["view_data"] = page_df
+
+        # --- PAGER ---
+        p1, p2, p3 = st.columns([1, 2, 1])
+        if p1.button("⬅️ Newer", disabled=len(cursors) == 1, key="records_newer"):
+            cursors.pop()
+            st.rerun()
+        p2.caption(f"Page {len(cursors)} · {RECORDS_PAGE_SIZE} per page, newest first")
+        if p3.button("Older ➡️", disabled=next_cursor is None, key="records_older"):
+            cursors.append(next_cursor)
+            st.rerun()
             
     # --- 3. DATA DISPLAY ---
     if st.button("🔄 Refresh Table", key="refresh_view"): 
-        st.session_state["view_data"] = run_query("SELECT * FROM taxi_travels ORDER BY s_no DESC LIMIT 50", fetch=True)
+        load_records_page.clear()
+        st.session_state["records_cursors"] = [None]
         st.rerun()
 
     df_view = st.session_state["view_data"]
@@ -304,4 +431,52 @@ with tab_view:
             height=500
         )
     elif df_view is not None and df_view.empty:
-        st.info("No records found matching your criteria.")
\ No newline at end of file
+        st.info("No records found matching your criteria.")
+
+# ================= TAB 3: DASHBOARD =================
+with tab_dash:
+    today = date.today()
+    d_range = st.date_input("Period", value=(today.replace(day=1), today), key="dash_range")
+
+    if len(d_range) < 2:
+        st.info("Pick the last day of the period.")
+    else:
+        try:
+            dash = load_dashboard(d_range[0], d_range[1])
+        except Exception as e:
+            st.error(f"❌ {e}")
+            dash = None
+
+        if dash is not None and dash["spend"].empty:
+            st.info("No trips in this period.")
+        elif dash is not None:
+            spend, shifts, employees = dash["spend"], dash["shifts"], dash["employees"]
+
+            # --- TOTALS ---
+            k1, k2, k3, k4 = st.columns(4)
+            k1.metric("Total Spend (₹)", f"{spend['amount'].sum():,.0f}")
+            k2.metric("Trips", f"{spend['trips'].sum():,}")
+            k3.metric("Passengers", f"{spend['passengers'].sum():,}")
+            k4.metric("Cost / Passenger (₹)", f"{spend['amount'].sum() / max(spend['passengers'].sum(), 1):,.2f}")
+
+            # --- SPEND PER DAY (by travel type) ---
+            st.caption("Spend per day")
+            st.bar_chart(spend.pivot_table(index="travel_date", columns="travel_type", values="amount", aggfunc="sum"))
+
+            # --- PEAK SHIFT TIMES ---
+            st.caption("Trips per shift")
+            st.bar_chart(shifts.pivot_table(index="shift_time", columns="direction", values="trips", aggfunc="sum"))
+
+            # --- COST PER EMPLOYEE ---
+            st.caption(f"Cost per employee (whole months, top {len(employees)})")
+            st.dataframe(
+                employees,
+                column_config={
+                    "sap_id": st.column_config.NumberColumn("ID", format="%d"),
+                    "emp_name": st.column_config.TextColumn("Employee Name", width="medium"),
+                    "trips": st.column_config.NumberColumn("Trips", format="%d"),
+                    "cost": st.column_config.NumberColumn("Cost (₹)", format="%.2f"),
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
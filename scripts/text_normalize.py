@@ -0,0 +1,64 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Text clean-up shared by the cleaners, run as pyarrow.compute kernels (one pass
+# over the column in C, no per-cell Python lambdas). Results are Arrow-backed
+# strings (string[pyarrow]). Missing cells (NaN / None / NaT) stay missing:
+# the old `astype(str).str.strip().str.upper()` wrote them out as 'NAN' / 'NONE'.
+
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+
+def to_arrow_text(values):
+    """Series -> pyarrow string array. Missing cells become nulls; numbers, dates and times are str()'d."""
+    if not isinstance(values.dtype, pd.StringDtype) and pd.api.types.infer_dtype(values, skipna=True) != "string":
+        values = values.where(values.isna(), values.astype(str))
+    return pa.array(values, type=pa.string(), from_pandas=True)
+
+
+def as_text_series(arr, index):
+    return pd.Series(pd.arrays.ArrowStringArray(arr), index=index)
+
+
+def clean_text(values, upper=True):
+    """Trimmed (and upper-cased) copy of a text column."""
+    arr = pc.utf8_trim_whitespace(to_arrow_text(values))
+    if upper:
+        arr = pc.utf8_upper(arr)
+    return as_text_series(arr, values.index)
+
+
+def replace_text(values, replacements):
+    """Literal substring replacements, applied in order: {'-': ''}, {'LOGIN': 'PICKUP', ...}."""
+    arr = to_arrow_text(values)
+    for old, new in replacements.items():
+        arr = pc.replace_substring(arr, old, new)
+    return as_text_series(arr, values.index)
+
+
+def split_first_word(values):
+    """'Login 08:30' -> ('Login', '08:30'). The rest is missing when the cell has one word only."""
+    parts = pc.extract_regex(pc.utf8_trim_whitespace(to_arrow_text(values)), r"(?s)^(?P<first>\S*)\s*(?P<rest>.*)$")
+    first, rest = pc.struct_field(parts, "first"), pc.struct_field(parts, "rest")
+    rest = pc.if_else(pc.equal(rest, ""), pa.scalar(None, pa.string()), rest)
+    return as_text_series(first, values.index), as_text_series(rest, values.index)
+
+
+def clean_categories(values, upper=True):
+    """clean_text() for a categorical column: only its distinct values are cleaned."""
+    cleaned = clean_text(pd.Series(values.cat.categories), upper)
+    if cleaned.is_unique:
+        return values.cat.rename_categories(cleaned.array)
+    # ' Female' and 'FEMALE' became one value: rebuild the categories
+    return pd.Series(cleaned.array.take(values.cat.codes.to_numpy(), allow_fill=True), index=values.index, dtype="category")
+
+
+def normalize_frame(df, upper=True):
+    """clean_text() on every text column (object / string / category dtype); numeric, date and time columns are left alone."""
+    for col in df.select_dtypes(include=["object", "string", "category"]).columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.ArrowDtype) and not pa.types.is_string(values.dtype.pyarrow_dtype):
+            continue  # e.g. time64 (its dtype.kind is 'O', so select_dtypes counts it as object)
+        df[col] = clean_categories(values, upper) if isinstance(values.dtype, pd.CategoricalDtype) else clean_text(values, upper)
+    return df
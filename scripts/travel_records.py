@@ -0,0 +1,42 @@
+from psycopg2.extras import execute_values
+
+from voucher_allocator import allocate_voucher, split_vouchers
+from travel_rollups import add_trip_group
+
+INSERT_COLUMNS = [
+    "travel_date", "travel_type", "direction", "shift_time", "trip_id",
+    "sap_id", "emp_name", "address", "reason", "amount", "voucher_no",
+]
+
+INSERT_SQL = f"INSERT INTO taxi_travels ({', '.join(INSERT_COLUMNS)}) VALUES %s RETURNING s_no"
+
+
+def build_trip_rows(trip, employees, base_voucher):
+    """
+    One taxi_travels row per employee. The whole amount goes on the first
+    employee's (base) voucher; the others get A/B/C... splits with amount 0.
+    trip: dict with travel_date, travel_type, direction, shift_time, trip_id, reason, amount
+    employees: iterable of (employee_id, employee_name, address)
+    """
+    employees = list(employees)
+    vouchers = split_vouchers(base_voucher, len(employees))
+    return [
+        (trip["travel_date"], trip["travel_type"], trip["direction"], trip["shift_time"], trip["trip_id"],
+         int(emp_id), emp_name, address, trip["reason"], trip["amount"] if i == 0 else 0.0, vouchers[i])
+        for i, (emp_id, emp_name, address) in enumerate(employees)
+    ]
+
+
+def save_trip_group(cur, trip, employees):
+    """
+    Reserves a voucher and inserts the whole group with a single multi-row
+    INSERT ... RETURNING, inside the caller's transaction, then adds it to the
+    dashboard rollups (same transaction, so they never drift).
+    Returns (base_voucher, [s_no, ...]) in employee order.
+    """
+    base_voucher = allocate_voucher(cur)
+    rows = build_trip_rows(trip, employees, base_voucher)
+    # page_size=len(rows) keeps it one statement no matter how big the group is
+    returned = execute_values(cur, INSERT_SQL, rows, page_size=max(len(rows), 1), fetch=True)
+    add_trip_group(cur, rows)
+    return base_voucher, [r[0] for r in returned]
@@ -0,0 +1,155 @@
+import sys
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+# Summary tables for the Dashboard tab, so no page view scans taxi_travels.
+# save_trip_group() adds each saved group to them inside the same transaction,
+# so they always match taxi_travels. Rows written any other way need a
+# rebuild:  python scripts/travel_rollups.py --rebuild
+#
+# A "trip" is one voucher group (the base voucher row); "passengers" counts every
+# employee row. An employee's cost is their share of the group amount.
+
+DAILY_DDL = """CREATE TABLE IF NOT EXISTS travel_daily_rollup (
+    travel_date DATE NOT NULL,
+    direction TEXT NOT NULL,
+    shift_time TEXT NOT NULL,
+    travel_type TEXT NOT NULL,
+    trips INTEGER NOT NULL,
+    passengers INTEGER NOT NULL,
+    amount NUMERIC NOT NULL,
+    PRIMARY KEY (travel_date, direction, shift_time, travel_type)
+)"""
+
+EMPLOYEE_DDL = """CREATE TABLE IF NOT EXISTS employee_monthly_rollup (
+    month DATE NOT NULL,
+    sap_id BIGINT NOT NULL,
+    emp_name TEXT,
+    trips INTEGER NOT NULL,
+    cost NUMERIC NOT NULL,
+    PRIMARY KEY (month, sap_id)
+)"""
+
+# --- FULL (RE)BUILD FROM taxi_travels ---
+# Only fill empty tables, so db_schema.py can run them on every deploy.
+DAILY_SEED = r"""INSERT INTO travel_daily_rollup (travel_date, direction, shift_time, travel_type, trips, passengers, amount)
+    SELECT travel_date, COALESCE(direction, ''), COALESCE(shift_time, ''), COALESCE(travel_type, ''),
+           COUNT(*) FILTER (WHERE voucher_no ~ '^\d{8}-\d+$'), COUNT(*), COALESCE(SUM(amount), 0)
+    FROM taxi_travels
+    WHERE travel_date IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM travel_daily_rollup)
+    GROUP BY 1, 2, 3, 4"""
+
+EMPLOYEE_SEED = r"""INSERT INTO employee_monthly_rollup (month, sap_id, emp_name, trips, cost)
+    WITH shares AS (
+        SELECT DATE_TRUNC('month', travel_date)::DATE AS month, sap_id, emp_name, s_no,
+               COALESCE(SUM(amount) OVER grp, 0) / COUNT(*) OVER grp AS cost
+        FROM taxi_travels
+        WHERE travel_date IS NOT NULL
+        WINDOW grp AS (PARTITION BY COALESCE(SUBSTRING(voucher_no FROM '^\d{8}-\d+'), s_no::TEXT))
+    )
+    SELECT month, sap_id, (ARRAY_AGG(emp_name ORDER BY s_no DESC))[1], COUNT(*), SUM(cost)
+    FROM shares
+    WHERE sap_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM employee_monthly_rollup)
+    GROUP BY month, sap_id"""
+
+# --- INCREMENTAL (one saved group) ---
+DAILY_UPSERT = """
+    INSERT INTO travel_daily_rollup (travel_date, direction, shift_time, travel_type, trips, passengers, amount)
+    VALUES (%s, %s, %s, %s, 1, %s, %s)
+    ON CONFLICT (travel_date, direction, shift_time, travel_type) DO UPDATE
+    SET trips = travel_daily_rollup.trips + 1,
+        passengers = travel_daily_rollup.passengers + EXCLUDED.passengers,
+        amount = travel_daily_rollup.amount + EXCLUDED.amount
+"""
+
+EMPLOYEE_UPSERT = """
+    INSERT INTO employee_monthly_rollup (month, sap_id, emp_name, trips, cost) VALUES %s
+    ON CONFLICT (month, sap_id) DO UPDATE
+    SET emp_name = EXCLUDED.emp_name,
+        trips = employee_monthly_rollup.trips + EXCLUDED.trips,
+        cost = employee_monthly_rollup.cost + EXCLUDED.cost
+"""
+# Share = group amount / group size, divided in NUMERIC like the seed
+EMPLOYEE_TEMPLATE = "(%s, %s, %s, %s, %s::NUMERIC * %s / %s)"
+
+# --- DASHBOARD READS (rollup tables only) ---
+SPEND_BY_DAY_SQL = """
+    SELECT travel_date, travel_type, SUM(trips) AS trips, SUM(passengers) AS passengers, SUM(amount) AS amount
+    FROM travel_daily_rollup WHERE travel_date BETWEEN %s AND %s
+    GROUP BY travel_date, travel_type ORDER BY travel_date
+"""
+
+SHIFT_LOAD_SQL = """
+    SELECT shift_time, direction, SUM(trips) AS trips, SUM(passengers) AS passengers, SUM(amount) AS amount
+    FROM travel_daily_rollup WHERE travel_date BETWEEN %s AND %s
+    GROUP BY shift_time, direction ORDER BY trips DESC
+"""
+
+EMPLOYEE_COST_SQL = """
+    SELECT sap_id, MAX(emp_name) AS emp_name, SUM(trips) AS trips, ROUND(SUM(cost), 2) AS cost
+    FROM employee_monthly_rollup WHERE month BETWEEN %s AND %s
+    GROUP BY sap_id ORDER BY cost DESC LIMIT %s
+"""
+
+TOP_EMPLOYEES = 50
+
+
+def add_trip_group(cur, rows):
+    """
+    Adds one saved group (rows from travel_records.build_trip_rows) to the rollups,
+    inside the caller's transaction.
+    """
+    if not rows:
+        return
+    travel_date, travel_type, direction, shift_time = rows[0][:4]
+    amount = sum(row[9] or 0 for row in rows)
+    cur.execute(DAILY_UPSERT, (travel_date, direction or "", shift_time or "", travel_type or "", len(rows), amount))
+
+    # The same employee twice in one group is one upsert row (ON CONFLICT can't touch a row twice);
+    # sorted so concurrent saves lock the rollup rows in the same order
+    month = travel_date.replace(day=1)
+    per_employee = defaultdict(lambda: [None, 0])
+    for row in rows:
+        per_employee[row[5]][0] = row[6]
+        per_employee[row[5]][1] += 1
+    values = [(month, sap_id, name, count, amount, count, len(rows))
+              for sap_id, (name, count) in sorted(per_employee.items())]
+    execute_values(cur, EMPLOYEE_UPSERT, values, template=EMPLOYEE_TEMPLATE, page_size=max(len(values), 1))
+
+
+def rebuild_rollups(cur):
+    """Recomputes both tables from taxi_travels, blocking saves meanwhile (caller commits)."""
+    cur.execute("LOCK TABLE taxi_travels IN SHARE MODE")
+    cur.execute("DELETE FROM travel_daily_rollup")
+    cur.execute("DELETE FROM employee_monthly_rollup")
+    cur.execute(DAILY_SEED)
+    cur.execute(EMPLOYEE_SEED)
+
+
+def dashboard_queries(date_from, date_to, top=TOP_EMPLOYEES):
+    """{name: (sql, params)} for the Dashboard tab; the employee table covers whole months."""
+    return {
+        "spend": (SPEND_BY_DAY_SQL, (date_from, date_to)),
+        "shifts": (SHIFT_LOAD_SQL, (date_from, date_to)),
+        "employees": (EMPLOYEE_COST_SQL, (date_from.replace(day=1), date_to.replace(day=1), top)),
+    }
+
+
+# --- MAIN EXECUTION ---
+if __name__ == "__main__":
+    from data_loader import get_db_connection
+
+    if "--rebuild" not in sys.argv:
+        sys.exit("Usage: python scripts/travel_rollups.py --rebuild")
+    conn = get_db_connection()
+    if not conn: sys.exit(1)
+    with conn.cursor() as cur:
+        cur.execute(DAILY_DDL)
+        cur.execute(EMPLOYEE_DDL)
+        rebuild_rollups(cur)
+    conn.commit()
+    conn.close()
+    print("✅ Rollups rebuilt from taxi_travels.")
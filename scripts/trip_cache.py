@@ -0,0 +1,85 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Entry tab search cache, shared by every session of the app (st.cache_resource).
+# Keys are (travel_type, trip_id, trip_date); values are the dump rows as dicts.
+# Entries expire after LOOKUP_TTL, the oldest are dropped past LOOKUP_CACHE_SIZE,
+# and everything is dropped when data_loader.py has ingested new files
+# (ingestion_ledger changed), checked at most every VERSION_CHECK_SECS.
+
+LOOKUP_CACHE_SIZE = 2000
+LOOKUP_TTL = 15 * 60
+VERSION_CHECK_SECS = 30
+
+# Changes whenever data_loader commits a new file
+LEDGER_VERSION_SQL = "SELECT COUNT(*), MAX(loaded_at) FROM ingestion_ledger"
+
+
+class TripLookupCache:
+    def __init__(self, max_entries=LOOKUP_CACHE_SIZE, ttl=LOOKUP_TTL, version_check=VERSION_CHECK_SECS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check = version_check
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "prefetched": 0}
+
+    def get(self, key):
+        """Cached rows for key, or None (missing / expired)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, rows):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def sync(self, fetch_version):
+        """
+        Drops every entry if the loader ingested something since the last check.
+        fetch_version() runs LEDGER_VERSION_SQL; it is called at most every version_check seconds.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.version_check:
+            return
+        self._checked_at = now
+        version = fetch_version()
+        if version is not None and version != self._version:
+            if self._version is not None:
+                self.clear()
+                self.stats["invalidations"] += 1
+            self._version = version
+
+    def prefetch(self, travel_type, rows, trip_date=None):
+        """
+        Stores a whole day of dump rows (dicts with trip_id) as individual lookups.
+        trip_date is part of the key for Manual searches only, like the real query.
+        """
+        by_trip = {}
+        for row in rows:
+            row = dict(row)
+            by_trip.setdefault(row.pop("trip_id"), []).append(row)
+        for trip_id, trip_rows in by_trip.items():
+            self.put((travel_type, trip_id, trip_date if travel_type == "Manual" else None), trip_rows)
+        self.stats["prefetched"] += len(by_trip)
+        return len(by_trip)
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries, "ttl_secs": self.ttl}
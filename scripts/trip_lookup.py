@@ -0,0 +1,90 @@
+import re
+
+# Columns the Entry tab needs from the dump tables
+LOOKUP_COLUMNS = "employee_id, employee_name, gender, address, direction, trip_date, shift_time"
+
+# trip_id is bound as an integer so Postgres can use the trip_id indexes
+# (CAST(trip_id AS TEXT) = %s forced a sequential scan of the whole dump)
+DUMP_LOOKUPS = {
+    "Application": f"SELECT {LOOKUP_COLUMNS} FROM application_data_dump WHERE trip_id = %s",
+    "Manual": f"SELECT {LOOKUP_COLUMNS} FROM manual_data_dump WHERE trip_id = %s AND trip_date = %s",
+}
+
+# A whole day of trips for the Entry tab's prefetch (served from memory afterwards).
+# Application lookups are by trip_id alone, so every row of the day's trips is fetched.
+PREFETCH_LOOKUPS = {
+    "Application": f"SELECT trip_id, {LOOKUP_COLUMNS} FROM application_data_dump "
+                   f"WHERE trip_id IN (SELECT trip_id FROM application_data_dump WHERE trip_date = %s)",
+    "Manual": f"SELECT trip_id, {LOOKUP_COLUMNS} FROM manual_data_dump WHERE trip_date = %s",
+}
+
+# Columns the Records tab shows (explicit, so new/wide columns never ride along)
+RECORD_COLUMNS = (
+    "s_no, travel_date, travel_type, direction, shift_time, trip_id, "
+    "sap_id, emp_name, address, reason, amount, voucher_no"
+)
+
+RECORDS_BY_TRIP = f"SELECT {RECORD_COLUMNS} FROM taxi_travels WHERE trip_id = %s"
+
+RECORDS_PAGE_SIZE = 50
+
+
+def parse_trip_id(value):
+    """Turns user input like ' 1234567 ' or 'T1234567' into an int, or None if it is not a trip ID."""
+    text = str(value or "").strip().upper()
+    if not re.fullmatch(r"T?\d+", text):
+        return None
+    return int(text.lstrip("T"))
+
+
+def dump_lookup_query(travel_type, trip_id, trip_date=None):
+    """Returns (sql, params) for the Entry tab search."""
+    sql = DUMP_LOOKUPS[travel_type]
+    params = (trip_id, trip_date) if travel_type == "Manual" else (trip_id,)
+    return sql, params
+
+
+def prefetch_query(travel_type, trip_date):
+    """Returns (sql, params) loading every lookup of trip_date for travel_type."""
+    return PREFETCH_LOOKUPS[travel_type], (trip_date,)
+
+
+def records_query(trip_id, travel_date=None):
+    """Returns (sql, params) for the Records tab trip search."""
+    sql = RECORDS_BY_TRIP
+    params = [trip_id]
+    if travel_date:
+        sql += " AND travel_date = %s"
+        params.append(travel_date)
+    sql += " ORDER BY s_no ASC"
+    return sql, tuple(params)
+
+
+def records_page_query(before_s_no=None, date_from=None, date_to=None, voucher=None, page_size=RECORDS_PAGE_SIZE):
+    """
+    Returns (sql, params) for one Records tab page, newest first.
+    Keyset pagination: the next page starts below the last s_no shown, so page 1000
+    costs the same as page 1 (OFFSET would re-read every skipped row).
+    Fetches page_size + 1 rows; the extra row only says whether an older page exists.
+    """
+    where, params = [], []
+    if before_s_no is not None:
+        where.append("s_no < %s")
+        params.append(before_s_no)
+    if date_from:
+        where.append("travel_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("travel_date <= %s")
+        params.append(date_to)
+    if voucher:
+        # Prefix match (uses the voucher_no text_pattern_ops index); user text is escaped
+        where.append("voucher_no LIKE %s")
+        params.append(re.sub(r"([\\%_])", r"\\\1", voucher.strip().upper()) + "%")
+
+    sql = f"SELECT {RECORD_COLUMNS} FROM taxi_travels"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY s_no DESC LIMIT %s"
+    params.append(page_size + 1)
+    return sql, tuple(params)
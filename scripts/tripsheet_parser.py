@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from excel_reader import read_excel
+from stage_profiler import timed_stage
+from text_normalize import TEXT_DTYPE, replace_text, split_first_word, to_arrow_text
+
+# ---------------------------------------------------------
+# Shared TripSheet parsing core.
+# Raw vendor sheets interleave one "header" row per trip (date, agency,
+# login time, vehicle ...) with its passenger rows. Every cleaner calls
+# parse_tripsheet() and only adds its own finishing touches on top.
+# ---------------------------------------------------------
+
+HEADER_MAPPING = {
+    0: 'Trip_Date', 1: 'Agency_Name', 2: 'Driver_Login_Time', 3: 'Vehicle_No',
+    4: 'Driver_Name', 5: 'Trip_Zone', 6: 'Driver_Mobile', 7: 'Marshall',
+    8: 'Distance', 9: 'Emp_Count', 10: 'Trip_Count', 11: 'Trip_Sheet_ID_Raw'
+}
+
+PASSENGER_MAPPING = {
+    0: 'Pax_no', 1: 'Reporting_Time', 2: 'Employee_ID', 3: 'Employee_Name',
+    4: 'Gender', 5: 'Emp_Category', 6: 'Flight_No.', 7: 'Address',
+    8: 'Reporting_Location', 9: 'Landmark', 10: 'Passenger_Mobile', 11: 'Pax_Col_11_Empty'
+}
+
+# --- CLEANED TRIP RECORD TYPES ---
+# Applied at the end of parse_tripsheet(). Values repeated on every passenger row are
+# categoricals (each distinct value stored once), IDs / counts are nullable ints,
+# free text is string[pyarrow]. Columns not listed keep whatever the sheet gave.
+TIME_DTYPE = pd.ArrowDtype(pa.time32('s'))
+
+TRIP_SCHEMA = {
+    'Trip_ID': 'Int32', 'Employee_ID': 'Int32', 'Pax_no': 'Int8', 'Emp_Count': 'Int8',
+    'Passenger_Mobile': 'Int64', 'Driver_Mobile': 'Int64', 'Distance': 'Float64',
+    'Trip_Date': 'datetime64[ns]', 'Shift_Time': TIME_DTYPE,
+    'Agency_Name': 'category', 'Direction': 'category', 'Gender': 'category', 'Emp_Category': 'category',
+    'Reporting_Location': 'category', 'Reporting_Time': 'category', 'Trip_Zone': 'category',
+    'Vehicle_No': 'category', 'Driver_Name': 'category', 'Flight_No.': 'category',
+    'Employee_Name': TEXT_DTYPE, 'Address': TEXT_DTYPE, 'Landmark': TEXT_DTYPE, 'Marshall': TEXT_DTYPE,
+}
+
+
+def text(df, col):
+    """Column as strings (NaN -> 'nan'), or all-empty if the sheet is too narrow."""
+    if col not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[col].astype(str)
+
+
+def detect_trip_column(df, default=10):
+    """
+    First column whose first 10 rows contain a 'T1234567' trip ID.
+    Needs 5+ digits so terminal codes like 'T3' in Reporting_Location don't win.
+    """
+    for col in df.columns:
+        if text(df.head(10), col).str.contains(r'^T\d{5,}', na=False).any():
+            return col
+    return default
+
+
+# --- VENDOR LAYOUT REGISTRY ---
+# is_header / is_passenger: df -> boolean mask, trip_id_column: df -> column label
+VENDOR_LAYOUTS = {
+    # United Facilities sheets: agency name in col 1, passenger numbers 1-5 in col 0
+    'UNITED FACILITIES': {
+        'header_mapping': HEADER_MAPPING,
+        'passenger_mapping': PASSENGER_MAPPING,
+        'is_header': lambda df: text(df, 1).str.contains("UNITED FACILITIES", regex=False),
+        'is_passenger': lambda df: text(df, 0).str.fullmatch(r"[1-5]"),
+        'trip_id_column': lambda df: 10,
+    },
+    # Any vendor (J Travels, Bajaj, ...): header rows have "Login/Logout" in col 2
+    'GENERIC': {
+        'header_mapping': HEADER_MAPPING,
+        'passenger_mapping': PASSENGER_MAPPING,
+        'is_header': lambda df: text(df, 2).str.contains("LOG", case=False, regex=False),
+        'is_passenger': lambda df: text(df, 0).str.fullmatch(r"\d+"),
+        'trip_id_column': detect_trip_column,
+    },
+}
+
+
+def register_layout(name, **layout):
+    """Adds (or overrides) a vendor layout; missing keys fall back to GENERIC."""
+    VENDOR_LAYOUTS[name] = {**VENDOR_LAYOUTS['GENERIC'], **layout}
+
+
+def load_raw_sheet(source):
+    """Reads a raw TripSheet (path or uploaded file) with no header row."""
+    # excel_reader picks calamine / openpyxl / xlrd (old .xls exports) and rewinds uploads between tries
+    return read_excel(source, header=None)
+
+
+def parse_tripsheet(raw_df, layout='UNITED FACILITIES', profiler=None):
+    """
+    Turns a raw sheet into one row per passenger with its trip header merged in.
+    Adds Trip_ID (no 'T'), Direction (PICKUP/DROP), Shift_Time_Obj (datetime) and Shift_Time (time).
+    profiler (StageProfiler, optional) times the split / merge / derive stages.
+    """
+    spec = VENDOR_LAYOUTS[layout]
+
+    with timed_stage(profiler, "split"):
+        # Row 1 is the report's sub-title; blank rows carry nothing
+        df = raw_df.drop(index=1, errors='ignore').dropna(how="all").reset_index(drop=True)
+
+        # 1. Trip ID: the "T..." cell starts a trip, forward-fill it onto its passengers
+        trip_ids = text(df, spec['trip_id_column'](df))
+        df['Trip_ID'] = trip_ids.where(trip_ids.str.startswith("T")).ffill()
+
+        # 2. Split header vs passenger rows, keeping only the mapped columns
+        header_mapping, passenger_mapping = spec['header_mapping'], spec['passenger_mapping']
+        header_cols = [c for c in header_mapping if c in df.columns] + ['Trip_ID']
+        passenger_cols = [c for c in passenger_mapping if c in df.columns] + ['Trip_ID']
+
+        df_headers = df.loc[spec['is_header'](df).to_numpy(), header_cols].rename(columns=header_mapping)
+        df_passengers = df.loc[spec['is_passenger'](df).to_numpy(), passenger_cols].rename(columns=passenger_mapping)
+
+    # 3. Merge
+    with timed_stage(profiler, "merge"):
+        final = pd.merge(df_passengers, df_headers, on='Trip_ID', how='left')
+
+    # 4. Cleaning
+    with timed_stage(profiler, "derive"):
+        derive_columns(final)
+
+    with timed_stage(profiler, "types"):
+        apply_trip_schema(final)
+
+    return final
+
+
+def derive_columns(final):
+    """Trip_ID / Vehicle_No / Direction / Shift_Time from the merged rows (Arrow string kernels, missing stays missing)."""
+    final['Trip_ID'] = replace_text(final['Trip_ID'], {'T': ''})
+    final['Vehicle_No'] = replace_text(final['Vehicle_No'], {'-': ''})
+
+    # "Login 08:30" -> Direction + Shift time (parsed once)
+    direction, shift_raw = split_first_word(final['Driver_Login_Time'])
+    final['Direction'] = replace_text(direction.str.upper(), {'LOGIN': 'PICKUP', 'LOGOUT': 'DROP'})
+    final['Shift_Time_Obj'] = pd.to_datetime(shift_raw, format='%H:%M', errors='coerce')
+    final['Shift_Time'] = final['Shift_Time_Obj'].dt.time
+    return final
+
+
+def to_schema_dtype(values, dtype):
+    """
+    One column converted to its TRIP_SCHEMA dtype. Number columns only convert when
+    nothing is lost: a text cell, a zero-padded number ('09812345678', '007123'), a fraction
+    or an out-of-range value keeps the column as it was.
+    """
+    if dtype == 'category':
+        return values.astype(TEXT_DTYPE).astype('category')
+    if dtype is TEXT_DTYPE:
+        return values.astype(TEXT_DTYPE)
+    if dtype is TIME_DTYPE:
+        return pd.Series(pa.array(values, type=TIME_DTYPE.pyarrow_dtype, from_pandas=True), index=values.index, dtype=TIME_DTYPE)
+    if dtype == 'datetime64[ns]':
+        return pd.to_datetime(values, errors='coerce')
+
+    if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+        # str() of a number never starts with '0<digit>', so this only hits zero-padded text cells
+        if pc.any(pc.match_substring_regex(to_arrow_text(values), r'^\s*0\d')).as_py():
+            return values
+    numbers = pd.to_numeric(values, errors='coerce')
+    present = numbers.dropna()
+    if numbers.isna().sum() != values.isna().sum():
+        return values
+    if dtype.startswith('Int'):
+        info = np.iinfo(dtype.lower())
+        if not ((present % 1 == 0).all() and present.between(info.min, info.max).all()):
+            return values
+    return numbers.astype(dtype)
+
+
+def apply_trip_schema(final, schema=TRIP_SCHEMA):
+    """Converts the parsed frame's columns to schema (in place) and returns it."""
+    for col, dtype in schema.items():
+        if col in final.columns:
+            final[col] = to_schema_dtype(final[col], dtype)
+    return final
@@ -0,0 +1,43 @@
+from datetime import date
+
+# Vouchers look like YYYYMMDD-SEQ (e.g. 20251213-01, 20251213-02).
+# The last SEQ handed out per day lives in voucher_counters (see db_schema.py),
+# so neither preview nor save has to scan taxi_travels. The entry app previews
+# with PREVIEW_SQL + format_voucher() (through its instrumented run_query).
+
+PREVIEW_SQL = "SELECT last_seq FROM voucher_counters WHERE voucher_date = %s"
+
+# One atomic statement: creates the day's row or bumps it. The row lock is held
+# until the caller commits, so two clerks saving at once get different numbers,
+# and a failed save rolls the number back instead of leaving a gap.
+ALLOCATE_SQL = """
+    INSERT INTO voucher_counters (voucher_date, last_seq) VALUES (%s, 1)
+    ON CONFLICT (voucher_date) DO UPDATE SET last_seq = voucher_counters.last_seq + 1
+    RETURNING last_seq
+"""
+
+
+def format_voucher(day, seq):
+    # Format: YYYYMMDD-01 (Using 2 digits for sequence)
+    return f"{day.strftime('%Y%m%d')}-{seq:02d}"
+
+
+def allocate_voucher(cur, day=None):
+    """Reserves the next voucher number inside the caller's transaction."""
+    day = day or date.today()
+    cur.execute(ALLOCATE_SQL, (day,))
+    return format_voucher(day, cur.fetchone()[0])
+
+
+def voucher_suffix(index):
+    """1 -> A, 26 -> Z, 27 -> AA, 28 -> AB ... (spreadsheet-style, no 26 limit)."""
+    suffix = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        suffix = chr(ord("A") + rem) + suffix
+    return suffix
+
+
+def split_vouchers(base_voucher, count):
+    """Base number for the first employee, then base+A, base+B, ... for the rest of the group."""
+    return [f"{base_voucher}{voucher_suffix(i)}" for i in range(count)]
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# The scripts import each other by bare name (python scripts/<name>.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+# Some scripts create their configured output folders on import (relative paths
+# outside Windows); keep those out of the checkout
+os.chdir(tempfile.mkdtemp(prefix="taxi_tests_"))
@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import pytest
+
+import batch_runner
+from batch_runner import run_batch
+
+
+def clean_ok(file_path):
+    return file_path + ".out.xlsx", 10
+
+
+def clean_fails(file_path):
+    raise ValueError("bad sheet")
+
+
+def make_files(tmp_path, count=3):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"sheet{i}.xlsx"
+        path.write_bytes(b"raw")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cleaned_files_are_moved(tmp_path, workers):
+    files = make_files(tmp_path)
+    summary = run_batch(clean_ok, files, str(tmp_path / "processed"), workers)
+    assert sorted(name for name, ok, rows, _ in summary if ok and rows == 10) == ["sheet0.xlsx", "sheet1.xlsx", "sheet2.xlsx"]
+    assert sorted(os.listdir(tmp_path / "processed")) == ["sheet0.xlsx", "sheet1.xlsx", "sheet2.xlsx"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_files_stay_in_place(tmp_path, workers):
+    files = make_files(tmp_path, 2)
+    summary = run_batch(clean_fails, files, str(tmp_path / "processed"), workers)
+    assert [ok for _, ok, _, _ in summary] == [False, False]
+    assert all(os.path.exists(f) for f in files)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_move_is_recorded_once(tmp_path, monkeypatch, workers):
+    real_move = shutil.move
+
+    def move(src, dst):
+        if src.endswith("sheet1.xlsx"):
+            raise PermissionError("file is open in Excel")
+        return real_move(src, dst)
+
+    monkeypatch.setattr(batch_runner.shutil, "move", move)
+    files = make_files(tmp_path)
+    summary = run_batch(clean_ok, files, str(tmp_path / "processed"), workers)
+    assert sorted((name, ok) for name, ok, _, _ in summary) == [
+        ("sheet0.xlsx", True), ("sheet1.xlsx", False), ("sheet2.xlsx", True)]
+    assert os.path.exists(files[1])
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from excel_reader import read_excel
+
+
+def make_sheet(path):
+    pd.DataFrame({"TRIP_ID": [1, 2], "ADDRESS": ["HOUSE 1", "HOUSE 2"]}).to_excel(path, index=False)
+    return path
+
+
+def test_function_options_are_not_cached(tmp_path):
+    path = make_sheet(tmp_path / "trips.xlsx")
+    cache_dir = tmp_path / "cache"
+    first = read_excel(path, cache_dir=str(cache_dir), usecols=lambda c: c == "TRIP_ID")
+    second = read_excel(path, cache_dir=str(cache_dir), usecols=lambda c: c == "ADDRESS")
+    assert list(first.columns) == ["TRIP_ID"]
+    assert list(second.columns) == ["ADDRESS"]
+    assert not cache_dir.exists()
+
+
+def test_cache_is_keyed_by_options(tmp_path):
+    path = make_sheet(tmp_path / "trips.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    assert list(read_excel(path, cache_dir=cache_dir, usecols=["TRIP_ID"]).columns) == ["TRIP_ID"]
+    assert list(read_excel(path, cache_dir=cache_dir, usecols=["ADDRESS"]).columns) == ["ADDRESS"]
+    cached = read_excel(path, cache_dir=cache_dir, dtype={"TRIP_ID": str})
+    assert cached.equals(read_excel(path, cache_dir=cache_dir, dtype={"TRIP_ID": str}))
+    assert cached["TRIP_ID"].tolist() == ["1", "2"]
@@ -0,0 +1,59 @@
+from datetime import time as dtime
+
+import pandas as pd
+import pytest
+
+from bench_manual_cleaner import differences, legacy_clean_excel_file
+from manual_data_clener import clean_excel_file
+from synthetic_sheets import manual_sheet, write_sheet
+
+# The old cleaner's REPORTING_TIME parse warns when it cannot guess one format
+pytestmark = pytest.mark.filterwarnings("ignore:Could not infer format")
+
+EDGE_ROWS = [
+    [None, None, None, None, 'EMPLOYEE ADDRESS "T3 TERMINAL"'] + [None] * 7,
+    ["ROUTE", "TRG", "EMP ID", "NAME", "ADDRESS", "MOBILE", "CAB", "PICKUP", "SHIFT", "REMARKS", "GENDER", "SHEET"],
+    [1, " ", 123456, " asha ", "HOUSE 1", "9800000000", 1234, dtime(7, 15), "08:30", "  ", "FEMALE", None],
+    [None, "NA", "654321", "ravi", "N/A", "", None, dtime(7, 15), dtime(9, 30), "N/A", "MALE", "NULL"],
+    [None, "\t", 777777, "  ", "HOUSE 3", "9800000002", "4321", "#N/A", " ", "LATE", "nan", None],
+    [None] * 12,
+    [2, "OJT", 111111, "meena", "HOUSE 4", 9800000003, 5678, dtime(22, 0), "22:00", "", "FEMALE", " "],
+]
+
+
+def cleaned_pair(path):
+    name = path.name
+    old, new = legacy_clean_excel_file(str(path), name), clean_excel_file(str(path), name)
+    assert old is not None and new is not None
+    return old, new
+
+
+@pytest.fixture
+def edge_sheet(tmp_path):
+    return write_sheet(pd.DataFrame(EDGE_ROWS), tmp_path / "02-12-2025 manual edge.xlsx")
+
+
+@pytest.mark.parametrize("rows", [50, 2000])
+def test_matches_csv_trick_on_synthetic_sheets(tmp_path, rows):
+    path = write_sheet(manual_sheet(rows, seed=rows), tmp_path / f"01-12-2025 manual {rows}.xlsx")
+    assert differences(*cleaned_pair(path)) == []
+
+
+def test_matches_csv_trick_on_blanks_and_na_tokens(edge_sheet):
+    assert differences(*cleaned_pair(edge_sheet)) == []
+
+
+def test_missing_text_stays_missing(edge_sheet):
+    # The old cleaner wrote these as the string 'NAN'
+    old, new = cleaned_pair(edge_sheet)
+    assert (old == 'NAN').any().any()
+    assert not new.isin(['NAN', 'NONE', 'NAT', '<NA>']).any().any()
+    asha = new[new['EMPLOYEE_NAME'] == 'ASHA'].iloc[0]
+    assert pd.isna(asha['MIS_REMARKS']) and pd.isna(asha['TRG_TYPE'])
+
+
+def test_seconds_shift_times_parse(edge_sheet):
+    # 'HH:MM' first, then an Excel time cell ('HH:MM:SS'): both become REPORTING_TIME
+    new = clean_excel_file(str(edge_sheet), edge_sheet.name).set_index('EMPLOYEE_NAME')['REPORTING_TIME']
+    assert new['ASHA'] == pd.Timestamp("2025-12-02 08:30")
+    assert new['RAVI'] == pd.Timestamp("2025-12-02 09:30")
@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from mearging_excel_files import merge_files
+
+
+def sheet(path, trip_ids):
+    pd.DataFrame({"TRIP_ID": trip_ids, "EMPLOYEE_NAME": [f"EMPLOYEE {t}" for t in trip_ids]}).to_excel(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "parquet"])
+def test_merges_every_file(tmp_path, fmt):
+    files = [sheet(tmp_path / "a.xlsx", [1, 2]), sheet(tmp_path / "b.xlsx", [3])]
+    output_path = str(tmp_path / f"combined.{fmt}")
+    report = merge_files(files, output_path, fmt)
+    assert [(name, rows, error) for name, rows, _, error in report] == [("a.xlsx", 2, None), ("b.xlsx", 1, None)]
+    merged = pd.read_excel(output_path) if fmt == "xlsx" else pd.read_parquet(output_path)
+    assert merged["TRIP_ID"].tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "parquet"])
+def test_no_output_when_nothing_is_readable(tmp_path, fmt):
+    bad = tmp_path / "broken.xlsx"
+    bad.write_bytes(b"not a workbook")
+    output_path = str(tmp_path / f"combined.{fmt}")
+    report = merge_files([str(bad)], output_path, fmt)
+    assert report[0][3] is not None
+    assert not os.path.exists(output_path)
+
+
+def test_file_failing_conversion_is_skipped_whole(tmp_path):
+    # Text in the (integer) TRIP_ID column can't be cast to the first file's schema
+    files = [sheet(tmp_path / "a.xlsx", [1, 2]), sheet(tmp_path / "b.xlsx", [3, "T4"]), sheet(tmp_path / "c.xlsx", [5])]
+    output_path = str(tmp_path / "combined.parquet")
+    report = merge_files(files, output_path, "parquet")
+    assert [error is None for *_, error in report] == [True, False, True]
+    assert pq.read_table(output_path).column("TRIP_ID").to_pylist() == [1, 2, 5]
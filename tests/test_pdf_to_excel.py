@@ -0,0 +1,40 @@
+from pdf_to_excel import page_rows
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+def tsv(words):
+    """image_to_data TSV for [(block, line, left, top, width, text)] words (height 20)."""
+    lines = [TSV_HEADER, "1\t1\t0\t0\t0\t0\t0\t0\t2480\t3508\t-1\t"]
+    for n, (block, line, left, top, width, text) in enumerate(words, 1):
+        lines.append(f"2\t1\t{block}\t0\t0\t0\t{left}\t{top}\t{width}\t20\t-1\t")
+        lines.append(f"5\t1\t{block}\t1\t{line}\t{n}\t{left}\t{top}\t{width}\t20\t91.5\t{text}")
+    return "\n".join(lines) + "\n"
+
+
+def test_columns_in_separate_blocks_come_out_row_by_row():
+    # Tesseract put every column of this table in its own block, listed column by column,
+    # with the usual few pixels of vertical jitter between cells of one printed row
+    words = [
+        (1, 1, 100, 100, 60, "DATE"), (1, 2, 100, 150, 90, "01-12-2025"), (1, 3, 100, 201, 90, "02-12-2025"),
+        (2, 1, 400, 102, 80, "VEHICLE"), (2, 2, 400, 148, 30, "HR"), (2, 2, 435, 148, 30, "55"),
+        (2, 3, 400, 203, 30, "DL"), (2, 3, 435, 203, 30, "01"),
+        (3, 1, 700, 99, 70, "AMOUNT"), (3, 2, 700, 152, 50, "1200"), (3, 3, 700, 199, 50, "850"),
+    ]
+    assert page_rows(tsv(words)) == [
+        ["DATE", "VEHICLE", "AMOUNT"],
+        ["01-12-2025", "HR 55", "1200"],
+        ["02-12-2025", "DL 01", "850"],
+    ]
+
+
+def test_missing_cells_stay_in_their_column():
+    words = [
+        (1, 1, 100, 100, 60, "DATE"), (2, 1, 400, 100, 80, "VEHICLE"), (3, 1, 700, 100, 70, "AMOUNT"),
+        (1, 2, 100, 150, 90, "01-12-2025"), (3, 2, 700, 151, 50, "1200"),
+    ]
+    assert page_rows(tsv(words)) == [["DATE", "VEHICLE", "AMOUNT"], ["01-12-2025", None, "1200"]]
+
+
+def test_empty_page():
+    assert page_rows(TSV_HEADER + "\n") == []
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from synthetic_sheets import raw_tripsheet
+from tripsheet_parser import parse_tripsheet, to_schema_dtype
+
+
+@pytest.mark.parametrize("cells, dtype", [
+    (["09812345678", "9876543210", None], "Int64"),
+    ([" 007123", 12345], "Int32"),
+    (["0011"], "Int8"),
+])
+def test_zero_padded_text_is_not_converted(cells, dtype):
+    values = pd.Series(cells, dtype=object)
+    result = to_schema_dtype(values, dtype)
+    assert result.dtype == object
+    assert result.tolist() == cells
+
+
+@pytest.mark.parametrize("cells, dtype, expected", [
+    (["9812345678", 9876543210, None], "Int64", [9812345678, 9876543210, pd.NA]),
+    (["0", "10", 7], "Int32", [0, 10, 7]),
+    (["0.5", 12.25], "Float64", [0.5, 12.25]),
+])
+def test_plain_numbers_are_converted(cells, dtype, expected):
+    result = to_schema_dtype(pd.Series(cells, dtype=object), dtype)
+    assert str(result.dtype) == dtype
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("cells, dtype", [
+    (["12", "AB12"], "Int32"),
+    ([1.5, 2], "Int8"),
+    ([1000], "Int8"),
+])
+def test_lossy_columns_keep_their_values(cells, dtype):
+    assert to_schema_dtype(pd.Series(cells, dtype=object), dtype).tolist() == cells
+
+
+def test_parsed_sheet_is_typed():
+    parsed = parse_tripsheet(raw_tripsheet(20, seed=1))
+    assert str(parsed["Trip_ID"].dtype) == "Int32"
+    assert str(parsed["Passenger_Mobile"].dtype) == "Int64"
+    assert isinstance(parsed["Trip_Zone"].dtype, pd.CategoricalDtype)